@@ -1,9 +1,12 @@
 import streamlit as st
-import pandas as pd
 import pydeck as pdk
+from enerconnect.render import CLUSTER_THRESHOLD, DEFAULT_ZOOM
+from enerconnect.ui import finish_rerun, map_layer, radius_filter, select_year, stage, start_rerun, warm_up
 
 # Page configuration
 st.set_page_config(page_title="Home | EnerConnect", layout="wide")
+timings = start_rerun("Home")
+warm_up()
 
 # Title and introduction
 st.title("Electricity Consumption Analysis Across Indian Cities 🗺️")
@@ -16,90 +19,71 @@ As India strives for sustainable and inclusive development, improving electricit
 Join us in exploring how innovative solutions can transform India's energy landscape and shape its path toward progress.
 """)
 
-# Load dataset 
-file_path = "DATASET DAA.csv"  
-df = pd.read_csv(file_path, sep=',')  
-
-# Convert Latitude and Longitude to strings, replace commas with dots, and convert to float
-df['Latitude'] = df['Latitude'].astype(str).str.replace(',', '.', regex=False).astype(float)
-df['Longitude'] = df['Longitude'].astype(str).str.replace(',', '.', regex=False).astype(float)
-
-# Convert columns to numeric
-category_cols = [
-    'Consumption of Electricity (in lakh units)-Domestic purpose',
-    'Consumption of Electricity (in lakh units)-Commercial purpose',
-    'Consumption of Electricity (in lakh units)-Industry purpose',
-    'Consumption of Electricity (in lakh units)-Public Water Work & Street Light',
-    'Consumption of Electricity (in lakh units)-Others'
-]
-
-# Convert specified columns to numeric
-for col in category_cols + ['Consumption of Electricity (in lakh units)-Total Consumption']:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
-
-# Fill missing values with the mean for the consumption columns
-df[category_cols] = df[category_cols].fillna(df[category_cols].mean())
-
-# Recalculate total consumption
-df['Consumption of Electricity (in lakh units)-Total Consumption'] = df[category_cols].sum(axis=1)
+st.markdown('<hr style="border: 2px solid orange;">', unsafe_allow_html=True)
+st.subheader("Electricity Distribution Map")
+st.write("Interactive map showing electricity distribution across various cities in India.")
 
-# Convert total consumption to MWh
-df['Total Consumption (MWh)'] = (df['Consumption of Electricity (in lakh units)-Total Consumption'] * 100).round(2)
+# Cities of the selected year (parsed once and shared by all pages and sessions)
+year, df, version = select_year("home_year")
 
-# Normalize the consumption data for color scaling
-df['color'] = df['Total Consumption (MWh)'].apply(
-    lambda x: [250, 250, 0, 200] if x < 50000 else  # yellow for <50,000
-              [255, 165, 0, 200] if 50000 <= x <= 200000 else  # Orange for 50,001 - 200,000
-              [255, 0, 0, 200]  # Red for >200,000
-)
+# Optionally narrow the map down to the cities around one city
+nearby = radius_filter(df, version, "home", chart_key="home_map")
+map_df = df if nearby is None else df.iloc[nearby]
 
-# Store the dataframe in session state
-st.session_state.df = df
+# Large selections are drawn as clusters sized for the chosen zoom level
+zoom = DEFAULT_ZOOM
+if len(map_df) > CLUSTER_THRESHOLD:
+    zoom = st.select_slider("Map detail (zoom level)", options=list(range(3, 11)), value=DEFAULT_ZOOM)
 
 # Create the tooltip content
 tooltip = {
-    "text": """{City} 
-    Domestic Consumption: {Consumption of Electricity (in lakh units)-Domestic purpose} lakh units
-    Commercial Consumption: {Consumption of Electricity (in lakh units)-Commercial purpose} lakh units
-    Industry Consumption: {Consumption of Electricity (in lakh units)-Industry purpose} lakh units
-    Public Consumption: {Consumption of Electricity (in lakh units)-Public Water Work & Street Light} lakh units
-    Others Consumption: {Consumption of Electricity (in lakh units)-Others} lakh units
-    Total Consumption (MWh): {Total Consumption (MWh)} MWh
+    "text": """{city} 
+    Domestic Consumption: {domestic} lakh units
+    Commercial Consumption: {commercial} lakh units
+    Industry Consumption: {industry} lakh units
+    Public Consumption: {public} lakh units
+    Others Consumption: {others} lakh units
+    Total Consumption (MWh): {mwh} MWh
     """,
     "style": {"backgroundColor": "steelblue", "color": "white"},
 }
 
-# Create the Pydeck layer
-layer = pdk.Layer(
-    "ScatterplotLayer",
-    data=df,
-    get_position=["Longitude", "Latitude"],
-    get_color="color",  # Use the 'color' column for dynamic colors
-    get_radius=50000,  # Radius in meters
-    pickable=True,
-    auto_highlight=True,
-)
-
-# Define the map view
-view_state = pdk.ViewState(
-    latitude=df['Latitude'].mean(),
-    longitude=df['Longitude'].mean(),
-    zoom=5,
-    pitch=0,
-)
-
-# Create the map
-map = pdk.Deck(
-    layers=[layer],
-    initial_view_state=view_state,
-    tooltip=tooltip,  # Apply tooltip
-)
-
-# Display the map
-st.markdown('<hr style="border: 2px solid orange;">', unsafe_allow_html=True)
-st.subheader("Electricity Distribution Map")
-st.write("Interactive map showing electricity distribution across various cities in India.")
-st.pydeck_chart(map)
+# Build the map and send it to the browser
+with stage("render"):
+    # Only the fields the layer and tooltip use, cached between reruns
+    records, clustered = map_layer(df, version, nearby, zoom)
+    if clustered:
+        st.caption(f"{len(map_df):,} cities grouped into {len(records):,} clusters with summed consumption.")
+
+    # Create the Pydeck layer
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        id="cities",
+        data=records,
+        get_position=["lon", "lat"],
+        get_color="color",  # Color of the consumption tier
+        get_radius="radius",  # Radius in meters
+        pickable=True,
+        auto_highlight=True,
+    )
+
+    # Define the map view
+    view_state = pdk.ViewState(
+        latitude=map_df['Latitude'].mean(),
+        longitude=map_df['Longitude'].mean(),
+        zoom=zoom,
+        pitch=0,
+    )
+
+    # Create the map
+    map = pdk.Deck(
+        layers=[layer],
+        initial_view_state=view_state,
+        tooltip=tooltip,  # Apply tooltip
+    )
+
+    # Display the map; clicking a city makes it the centre of the radius filter
+    st.pydeck_chart(map, on_select="rerun", key="home_map")
 
 # Add legend with a more attractive design
 st.markdown("""
@@ -117,4 +101,6 @@ st.markdown("""
 <div style="text-align: center; color: gray;">
     <small>© 2024 EnerConnect. All rights reserved.</small>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_rerun(timings)
\ No newline at end of file
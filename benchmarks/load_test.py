@@ -0,0 +1,156 @@
+# Load test of the Distribution page's MST work under concurrent sessions.
+#
+#   python -m benchmarks.load_test --sessions 32 --cities 2000 --weights 0.6 0.5
+#
+# Every simulated session reruns the page a few times: it requests the MST for
+# one of the weight splits, waits for it, then re-roots it at a random city and
+# builds the map payloads, like a rerun of the page. With --mode jobs (the
+# page's behaviour) all sessions share one JobCache, so identical requests
+# coalesce into one computation; --mode inline computes in each session's own
+# thread, like concurrent cache misses did before. Throughput, latency
+# percentiles and the number of MST computations are printed and one JSON line
+# is appended to the results file.
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from enerconnect.dataset import file_hash, load_dataset
+from enerconnect.jobs import DEFAULT_WORKERS, JobCache
+from enerconnect.mst import reroot_mst
+from enerconnect.store import ArtifactStore, cached_mst
+
+from .run_benchmarks import DEFAULT_OUTPUT, git_commit, page_payloads
+from .synthetic import write_synthetic_csv
+
+MODES = ["jobs", "inline"]
+
+PERCENTILES = [50, 95, 99]
+
+
+# One session: `reruns` page reruns with a random weight split and start city.
+# Appends the latency of every rerun to `latencies`.
+def run_session(df, weights, reruns, get_tree, seed, barrier, latencies):
+    rng = np.random.default_rng(seed)
+    cities = df['City'].tolist()
+    barrier.wait()
+    for _ in range(reruns):
+        started = time.perf_counter()
+        distance_weight = float(rng.choice(weights))
+        tree_edges = get_tree(distance_weight)
+        edges, _, _ = reroot_mst(tree_edges, int(rng.integers(len(df))), cities)
+        page_payloads(df, edges, 0)
+        latencies.append(time.perf_counter() - started)
+
+
+def load_test(df, version, sessions, reruns, weights, mode, workers, seed=0):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = ArtifactStore(cache_dir)
+        computations = []  # Weight split of every MST actually built
+
+        # Only a build reports progress; trees found in the store do not
+        def compute(distance_weight, report=None):
+            built = []
+
+            def progress(fraction, message, partial=None):
+                built.append(fraction)
+                if report is not None:
+                    report(fraction, message, partial)
+
+            tree = cached_mst(df, version, distance_weight, 1 - distance_weight, store=store, progress=progress)
+            if built:
+                computations.append(distance_weight)
+            return tree
+
+        jobs = JobCache(workers=workers) if mode == "jobs" else None
+        if jobs is not None:
+            def get_tree(distance_weight):
+                job = jobs.submit(("mst", version, distance_weight),
+                                  lambda report: compute(distance_weight, report))
+                return job.result()
+        else:
+            get_tree = compute
+
+        latencies = []
+        barrier = threading.Barrier(sessions + 1)
+        threads = [
+            threading.Thread(target=run_session,
+                             args=(df, weights, reruns, get_tree, seed + i, barrier, latencies))
+            for i in range(sessions)
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+        if jobs is not None:
+            jobs.shutdown()
+
+    latencies = np.array(latencies)
+    record = {
+        "mode": mode,
+        "sessions": sessions,
+        "reruns": reruns,
+        "weights": list(weights),
+        "workers": workers if mode == "jobs" else None,
+        "seconds": seconds,
+        "throughput": len(latencies) / seconds,
+        "mst_computations": len(computations),
+        "max_latency": float(latencies.max()),
+    }
+    for p in PERCENTILES:
+        record[f"p{p}_latency"] = float(np.percentile(latencies, p))
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the MST pipeline with concurrent simulated sessions.")
+    parser.add_argument("--sessions", type=int, default=16, help="Number of concurrent sessions.")
+    parser.add_argument("--reruns", type=int, default=5, help="Page reruns per session.")
+    parser.add_argument("--cities", type=int, default=2000, help="Size of the synthetic city set.")
+    parser.add_argument("--weights", type=float, nargs="+", default=[0.6],
+                        help="Distance weights the sessions choose from.")
+    parser.add_argument("--mode", choices=MODES, nargs="+", default=MODES)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Job pool size (jobs mode).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="JSON lines file to append to.")
+    args = parser.parse_args(argv)
+
+    run = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "benchmark": "load_test",
+        "size": args.cities,
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        path = write_synthetic_csv(Path(workdir) / f"cities_{args.cities}.csv", args.cities, args.seed)
+        df = load_dataset(path)
+        version = file_hash(path)
+
+    records = []
+    for mode in args.mode:
+        record = load_test(df, version, args.sessions, args.reruns, args.weights, mode, args.workers, args.seed)
+        records.append(record)
+        print(f"{mode:<7} {record['throughput']:8.2f} reruns/s  "
+              + "  ".join(f"p{p} {record[f'p{p}_latency'] * 1000:9.1f} ms" for p in PERCENTILES)
+              + f"  {record['mst_computations']} MST computations", file=sys.stderr)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps({**run, **record}) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
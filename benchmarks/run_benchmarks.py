@@ -0,0 +1,154 @@
+# Scaling benchmark of the EnerConnect pipeline on synthetic city sets.
+#
+#   python -m benchmarks.run_benchmarks --sizes 100 1000 10000
+#
+# Every stage (CSV load and cleaning, edge weights, MST, map payloads) is timed
+# separately with its peak traced memory, and one JSON line per stage is
+# appended to the results file together with the current git commit, so runs
+# from different commits can be compared. The MST is checked against networkx
+# on small sizes, and sparse results against the exact dense MST (relative
+# gap) up to --gap-limit.
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from enerconnect.dataset import load_dataset
+from enerconnect.graph import CondensedGraph
+from enerconnect.mst import SPARSE_THRESHOLD, candidate_graph, mst_gap, prim_heap, prim_mst
+from enerconnect.render import network_cities, network_edges, network_records
+from enerconnect.weights import weight_matrix
+
+from .synthetic import write_synthetic_csv
+
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results.jsonl"
+
+# Largest size checked against networkx (it builds the complete graph in Python)
+NETWORKX_LIMIT = 2000
+
+# Largest sparse size whose result is compared with the exact dense MST
+# (O(n^2) time, O(n) memory)
+GAP_LIMIT = 20000
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Run fn() and return (result, seconds, peak traced bytes or None)
+def measure(fn, memory=True):
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+# Map payloads as the Distribution page builds them
+def page_payloads(df, edges, start_city_idx):
+    edge_frame = network_edges(df, edges)
+    return network_records(network_cities(df, start_city_idx), edge_frame), edge_frame
+
+
+# MST cost from networkx over the complete graph, as an independent reference
+def networkx_mst_cost(df):
+    import networkx as nx
+
+    graph = nx.from_numpy_array(weight_matrix(df))
+    return nx.minimum_spanning_tree(graph).size(weight='weight')
+
+
+def benchmark_size(n, workdir, seed=0, memory=True, render_limit=None, gap_limit=GAP_LIMIT):
+    path = write_synthetic_csv(Path(workdir) / f"cities_{n}.csv", n, seed)
+    records = []
+
+    def record(stage, seconds, peak, **extra):
+        records.append({"size": n, "stage": stage, "seconds": seconds, "peak_bytes": peak, **extra})
+        print(f"{n:>8} {stage:<10} {seconds:10.4f}s" + (f" {peak / 2**20:10.1f} MiB" if peak is not None else ""),
+              file=sys.stderr)
+
+    df, seconds, peak = measure(lambda: load_dataset(path), memory)
+    record("load", seconds, peak)
+
+    sparse = n > SPARSE_THRESHOLD
+    if sparse:
+        graph, seconds, peak = measure(lambda: candidate_graph(df), memory)
+        record("weights", seconds, peak, mode="sparse", edges=int(len(graph.indices) // 2))
+        edges, seconds, peak = measure(lambda: prim_heap(graph), memory)
+    else:
+        graph, seconds, peak = measure(lambda: CondensedGraph.from_frame(df), memory)
+        record("weights", seconds, peak, mode="dense", edges=len(graph.data))
+        edges, seconds, peak = measure(lambda: prim_mst(df, weights=graph)[0], memory)
+    mst_cost = sum(weight for _, _, weight in edges)
+    record("mst", seconds, peak, mst_cost=mst_cost)
+    mst_record = records[-1]
+
+    if render_limit is None or n <= render_limit:
+        _, seconds, peak = measure(lambda: page_payloads(df, edges, 0), memory)
+        record("render", seconds, peak)
+
+    if n <= NETWORKX_LIMIT:
+        reference = networkx_mst_cost(df)
+        relative_error = abs(mst_cost - reference) / reference
+        mst_record["networkx_relative_error"] = relative_error
+        if not sparse and relative_error > 1e-6:
+            raise AssertionError(f"MST cost {mst_cost} differs from networkx {reference} for n={n}")
+
+    # How far the sparse candidate graph's tree is from the exact MST
+    if sparse and n <= gap_limit:
+        gap, seconds, _ = measure(lambda: mst_gap(df, mst_cost), memory=False)
+        mst_record["exact_cost"] = gap["exact_cost"]
+        mst_record["relative_gap"] = gap["relative_gap"]
+        print(f"{n:>8} {'gap':<10} {seconds:10.4f}s {gap['relative_gap']:.3e} relative", file=sys.stderr)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the EnerConnect pipeline on synthetic city sets.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="City counts to benchmark.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="JSON lines file to append to.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster, no peak memory).")
+    parser.add_argument("--render-limit", type=int, default=None,
+                        help="Skip the render stage above this size.")
+    parser.add_argument("--gap-limit", type=int, default=GAP_LIMIT,
+                        help="Compare sparse results with the exact MST up to this size.")
+    args = parser.parse_args(argv)
+
+    run = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        records = []
+        for n in args.sizes:
+            records.extend(benchmark_size(n, workdir, args.seed, not args.no_memory, args.render_limit,
+                                          args.gap_limit))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps({**run, **record}) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# Cold-start report of the Streamlit pages: how long a fresh worker process
+# takes to import each page's dependencies and to render the page once.
+#
+#   python -m benchmarks.startup
+#
+# Every page is measured in its own new Python process, against an empty
+# artifact store ("cold") and against one prepared by
+# `python -m enerconnect warmup` ("warm"). Per page and mode it records the
+# import time of the page's top-level imports, the slowest modules among them
+# (from python -X importtime), the first full script run (first paint) and the
+# wall time of the whole process (time to interactive). One JSON line per page
+# and mode is appended to the results file.
+import argparse
+import ast
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .run_benchmarks import DEFAULT_OUTPUT, git_commit
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = [ROOT / "1_🏠_Home.py", *sorted((ROOT / "pages").glob("*.py"))]
+MODES = ["cold", "warm"]
+
+# Modules listed per page, slowest (cumulative import time) first
+TOP_MODULES = 5
+
+# Run in the fresh process: import the page's dependencies, then render it
+# once with Streamlit's AppTest and print the timings as JSON
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+exec(compile(sys.argv[2], "imports", "exec"))
+imported = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+app.run()
+rendered = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "first_paint_seconds": rendered - harness,
+    "exceptions": [str(exception.value) for exception in app.exception],
+}))
+"""
+
+
+# Source of the top-level import statements of a page
+def page_imports(page):
+    tree = ast.parse(page.read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+# Slowest modules imported by `imports`, as (module, cumulative seconds)
+def slowest_imports(imports, env, count=TOP_MODULES):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", imports], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = (part.strip() for part in line.split("|"))
+        # Only top-level packages, so a package and its submodules count once
+        if not module.startswith(" ") and "." not in module:
+            modules.append((module, int(cumulative) / 1e6))
+    return sorted(modules, key=lambda item: -item[1])[:count]
+
+
+def measure_page(page, env):
+    imports = page_imports(page)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", PROBE, str(page), imports], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    process_seconds = time.perf_counter() - started
+    record = json.loads(result.stdout.strip().splitlines()[-1])
+    record["process_seconds"] = process_seconds
+    record["slowest_imports"] = slowest_imports(imports, env)
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time and first paint of the pages in fresh processes.")
+    parser.add_argument("--mode", choices=MODES, nargs="+", default=MODES)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="JSON lines file to append to.")
+    args = parser.parse_args(argv)
+
+    run = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "benchmark": "startup",
+    }
+    records = []
+    for mode in args.mode:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = {**os.environ, "ENERCONNECT_CACHE_DIR": cache_dir, "PYTHONPATH": str(ROOT)}
+            if mode == "warm":
+                subprocess.run([sys.executable, "-m", "enerconnect", "warmup"], cwd=ROOT, env=env,
+                               capture_output=True, check=True)
+            for page in PAGES:
+                record = {"mode": mode, "page": page.stem, **measure_page(page, env)}
+                records.append(record)
+                print(f"{mode:<5} {page.stem:<32} import {record['import_seconds']:7.3f}s  "
+                      f"first paint {record['first_paint_seconds']:7.3f}s  "
+                      f"process {record['process_seconds']:7.3f}s", file=sys.stderr)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps({**run, **record}) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+# Synthetic city sets with the schema of DATASET DAA.csv, for scaling tests
+import numpy as np
+import pandas as pd
+
+from enerconnect.dataset import CATEGORY_COLUMNS, TOTAL_COLUMN
+
+# Rough bounding box of mainland India
+LATITUDE_RANGE = (8.0, 34.0)
+LONGITUDE_RANGE = (68.0, 97.0)
+
+# Median consumption per category in lakh units, close to the real dataset
+CATEGORY_MEDIANS = [2000.0, 600.0, 500.0, 100.0, 150.0]
+
+
+# Raw frame of n cities: clustered coordinates around a few load centres,
+# log-normal consumption per category and a two-year Year column. A small
+# share of the values are blanked or use comma decimals, like the real file.
+def synthetic_cities(n, seed=0, years=("2017-18", "2018-19 ")):
+    rng = np.random.default_rng(seed)
+    centres = np.column_stack((
+        rng.uniform(*LATITUDE_RANGE, size=max(1, n // 500)),
+        rng.uniform(*LONGITUDE_RANGE, size=max(1, n // 500)),
+    ))
+    centre = rng.integers(len(centres), size=n)
+    lat = np.clip(centres[centre, 0] + rng.normal(0, 1.5, n), *LATITUDE_RANGE)
+    lon = np.clip(centres[centre, 1] + rng.normal(0, 1.5, n), *LONGITUDE_RANGE)
+
+    df = pd.DataFrame({
+        'City': [f"City {i:06d}" for i in range(n)],
+        'Year': rng.choice(list(years), size=n),
+    })
+    for col, median in zip(CATEGORY_COLUMNS, CATEGORY_MEDIANS):
+        values = np.round(rng.lognormal(np.log(median), 1.0, n), 2).astype(object)
+        values[rng.random(n) < 0.01] = np.nan
+        df[col] = values
+    df[TOTAL_COLUMN] = df[CATEGORY_COLUMNS].astype(float).sum(axis=1).round(2)
+
+    df['Latitude'] = np.round(lat, 6).astype(str)
+    df['Longitude'] = np.round(lon, 6).astype(str)
+    comma = rng.random(n) < 0.05
+    df.loc[comma, 'Latitude'] = df.loc[comma, 'Latitude'].str.replace('.', ',', regex=False)
+    return df
+
+
+# Write a synthetic dataset to CSV and return its path
+def write_synthetic_csv(path, n, seed=0):
+    synthetic_cities(n, seed).to_csv(path, index=False)
+    return path
@@ -0,0 +1,56 @@
+# Core logic of EnerConnect, kept free of Streamlit so it can be imported by
+# the pages, scripts and notebooks alike.
+from .analytics import TIERS, ConsumptionAnalytics
+from .dataset import (
+    CATEGORIES,
+    CATEGORY_COLUMNS,
+    DATASET_PATH,
+    MWH_COLUMN,
+    TOTAL_COLUMN,
+    clean_dataset,
+    file_hash,
+    load_dataset,
+)
+from .dynamic import DynamicNetwork
+from .export import EXPORT_FORMATS, cached_export, export_dataset, export_edges, export_ranking, write_export
+from .graph import CondensedGraph, CSRGraph
+from .ingest import ConsumptionAggregator, ingest_csv
+from .jobs import Job, JobCache
+from .layers import city_bounds, join_layers, join_polygons, line_links, nearest_points, read_layer
+from .mst import (
+    DEFAULT_LINE_COST,
+    SPARSE_THRESHOLD,
+    candidate_graph,
+    kruskal,
+    line_keys,
+    mst_gap,
+    prim_dense,
+    prim_heap,
+    prim_mst,
+    reroot_mst,
+    tree_csr,
+)
+from .paths import PathIndex
+from .pipeline import run_batch, run_join, run_pipeline
+from .regions import RegionTree
+from .render import (
+    CLUSTER_THRESHOLD,
+    REGION_COLORS,
+    edge_table,
+    grid_clusters,
+    layer_records,
+    network_cities,
+    network_edges,
+    network_records,
+    region_layers,
+    route_table,
+)
+from .spatial import SpatialIndex
+from .tables import page_bounds, page_count, table_view
+from .timeseries import TimeSeriesStore
+from .weights import (
+    calculate_distance,
+    calculate_edge_weight,
+    distance_matrix,
+    weight_matrix,
+)
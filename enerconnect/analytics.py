@@ -0,0 +1,58 @@
+# Precomputed analytics behind the Data page: summary metrics, consumption
+# tiers and per-category rankings, built once per dataset version. Tiers come
+# from a single classification pass and one stable grouping sort; every
+# category ranking is sorted once up front, so switching tier or category is
+# a dictionary lookup.
+import numpy as np
+import pandas as pd
+
+from .dataset import CATEGORIES, CATEGORY_COLUMNS, MWH_COLUMN, TOTAL_COLUMN, consumption_tier
+
+# Tier labels in consumption_tier order (0 low, 1 medium, 2 high)
+TIERS = ['Low', 'Medium', 'High']
+
+
+class ConsumptionAnalytics:
+    def __init__(self, df):
+        total = df[TOTAL_COLUMN].to_numpy(dtype=np.float64)
+        self.cities = df['City'].nunique()
+        self.total = float(total.sum())
+        self.mean = float(total.mean())
+        # Positions of the highest and lowest consumption (first one on ties)
+        self.highest = int(total.argmax())
+        self.lowest = int(total.argmin())
+
+        # Every city's tier in one pass; a stable sort by tier keeps the file
+        # order inside each tier
+        self.tier_codes = consumption_tier(df[MWH_COLUMN])
+        order = np.argsort(self.tier_codes, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(self.tier_codes, minlength=len(TIERS)))))
+        columns = ['City', *CATEGORY_COLUMNS, MWH_COLUMN]
+        self.tiers = {
+            tier: self._numbered(df, order[bounds[code]:bounds[code + 1]], columns)
+            for code, tier in enumerate(TIERS)
+        }
+
+        # Rank of every city in each category, highest consumption first
+        self.rankings = {}
+        for label, column in CATEGORIES.items():
+            values = pd.Series(df[column].to_numpy(dtype=np.float64))
+            ranked = values.sort_values(ascending=False, kind="stable").index.to_numpy()
+            self.rankings[label] = self._numbered(df, ranked, ['City', column])
+
+    # Rows at `positions`, rounded to 2 decimals and numbered from 1 (No.)
+    @staticmethod
+    def _numbered(df, positions, columns):
+        table = df[columns].iloc[positions].reset_index(drop=True)
+        numeric = table.columns.drop('City')
+        table[numeric] = table[numeric].round(2)
+        table.insert(0, 'No.', np.arange(1, len(table) + 1))
+        return table
+
+    # Cities of one tier ('Low', 'Medium' or 'High') in file order
+    def tier(self, tier):
+        return self.tiers[tier]
+
+    # Cities ranked by one category (a CATEGORIES label)
+    def ranking(self, label):
+        return self.rankings[label]
@@ -0,0 +1,91 @@
+# Command-line entry point: python -m enerconnect run|join|warmup <files> [options]
+import argparse
+import json
+import sys
+
+from .dataset import DATASET_PATH
+from .export import EXPORT_FORMATS
+from .layers import DEFAULT_SNAP_KM
+from .mst import DEFAULT_LINE_COST
+from .pipeline import OUTPUT_FORMATS, run_batch, run_join
+from .startup import warm_up
+from .weights import CONSUMPTION_WEIGHT, DISTANCE_WEIGHT
+
+
+# Parse "0.6,0.4" into (0.6, 0.4)
+def weight_pair(text):
+    try:
+        distance_weight, consumption_weight = (float(part) for part in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected DISTANCE,CONSUMPTION weights, got {text!r}")
+    return distance_weight, consumption_weight
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="enerconnect", description="EnerConnect distribution optimization pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Compute the MST for datasets and weight settings.")
+    run.add_argument("files", nargs="+", help="Input CSV files with the EnerConnect schema.")
+    run.add_argument("-w", "--weights", type=weight_pair, action="append", metavar="DISTANCE,CONSUMPTION",
+                     help=f"Weight split, may be repeated (default {DISTANCE_WEIGHT},{CONSUMPTION_WEIGHT}).")
+    run.add_argument("-o", "--output", default="results", help="Output directory (default: results).")
+    run.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="json", help="Format of the MST edge files.")
+    run.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: one per core).")
+    run.add_argument("--start-city", default=None, help="Starting city (default: first city of each file).")
+    run.add_argument("--mode", choices=("auto", "dense", "sparse"), default="auto", help="MST algorithm.")
+    run.add_argument("--gap", action="store_true",
+                     help="Report how far sparse results are from the exact MST (relative_gap; O(n^2) time).")
+    run.add_argument("--lines", default=None, help="GeoJSON/GeoParquet file of existing lines to reuse.")
+    run.add_argument("--line-cost", type=float, default=DEFAULT_LINE_COST,
+                     help=f"Cost of an edge along an existing line (default {DEFAULT_LINE_COST}).")
+    run.add_argument("--snap-km", type=float, default=DEFAULT_SNAP_KM,
+                     help=f"Snap line vertices to cities within this distance (default {DEFAULT_SNAP_KM} km).")
+
+    join = commands.add_parser("join", help="Join the cities to their state and nearest substation.")
+    join.add_argument("files", nargs="+", help="Input CSV files with the EnerConnect schema.")
+    join.add_argument("--states", default=None, help="GeoJSON/GeoParquet file of state boundaries.")
+    join.add_argument("--state-column", default="name", help="State name attribute (default: name).")
+    join.add_argument("--substations", default=None, help="GeoJSON/GeoParquet file of substations.")
+    join.add_argument("--substation-column", default=None, help="Substation name attribute (default: row number).")
+    join.add_argument("-o", "--output", default="results", help="Output directory (default: results).")
+    join.add_argument("-f", "--format", choices=list(EXPORT_FORMATS), default="csv", help="Format of the tables.")
+
+    warmup = commands.add_parser("warmup", help="Precompute the artifacts the app needs first, before it starts.")
+    warmup.add_argument("files", nargs="*", default=[str(DATASET_PATH)], help="Datasets (default: the app's dataset).")
+    warmup.add_argument("-w", "--weights", type=weight_pair, action="append", metavar="DISTANCE,CONSUMPTION",
+                        help=f"Weight split, may be repeated (default {DISTANCE_WEIGHT},{CONSUMPTION_WEIGHT}).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        summaries = run_batch(
+            args.files,
+            args.weights or [(DISTANCE_WEIGHT, CONSUMPTION_WEIGHT)],
+            args.output,
+            fmt=args.format,
+            workers=args.workers,
+            start_city=args.start_city,
+            mode=args.mode,
+            lines=args.lines,
+            line_cost=args.line_cost,
+            snap_km=args.snap_km,
+            gap=args.gap,
+        )
+        json.dump(summaries, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    elif args.command == "join":
+        if args.states is None and args.substations is None:
+            raise SystemExit("join: give --states and/or --substations.")
+        written = run_join(args.files, args.output, args.states, args.state_column,
+                           args.substations, args.substation_column, fmt=args.format)
+        json.dump(written, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    elif args.command == "warmup":
+        weights = args.weights or [(DISTANCE_WEIGHT, CONSUMPTION_WEIGHT)]
+        timings = {path: warm_up(path, weights) for path in args.files}
+        json.dump(timings, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
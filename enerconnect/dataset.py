@@ -0,0 +1,124 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Dataset shipped with the app, resolved from the repository root so that it
+# loads the same way whatever the working directory is
+DATASET_PATH = Path(__file__).resolve().parent.parent / "DATASET DAA.csv"
+
+# Consumption columns per category, keyed by the label shown in the pages
+CATEGORIES = {
+    'Domestic': 'Consumption of Electricity (in lakh units)-Domestic purpose',
+    'Commercial': 'Consumption of Electricity (in lakh units)-Commercial purpose',
+    'Industry': 'Consumption of Electricity (in lakh units)-Industry purpose',
+    'Public Water Work & Street Light': 'Consumption of Electricity (in lakh units)-Public Water Work & Street Light',
+    'Others': 'Consumption of Electricity (in lakh units)-Others',
+}
+CATEGORY_COLUMNS = list(CATEGORIES.values())
+TOTAL_COLUMN = 'Consumption of Electricity (in lakh units)-Total Consumption'
+MWH_COLUMN = 'Total Consumption (MWh)'
+
+# Consumption tiers in MWh: low < 50,000 <= medium <= 200,000 < high
+LOW_TIER_MAX = 50000
+MEDIUM_TIER_MAX = 200000
+TIER_COLORS = np.array([
+    [250, 250, 0, 200],  # yellow for <50,000
+    [255, 165, 0, 200],  # Orange for 50,001 - 200,000
+    [255, 0, 0, 200],  # Red for >200,000
+])
+
+# Column types fixed at parse time; coordinates are read as text because some
+# rows use a comma as decimal separator
+RAW_DTYPES = {
+    'City': 'string',
+    'Year': 'string',
+    'Latitude': 'string',
+    'Longitude': 'string',
+}
+
+
+# Cheap identity of a file version: modification time and size
+def file_signature(path=DATASET_PATH):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Content hash of a file, read in blocks so large files are never loaded whole
+def file_hash(path=DATASET_PATH, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Parse a coordinate column that may use a comma as decimal separator
+def parse_coordinate(values):
+    return pd.to_numeric(values.astype('string').str.replace(',', '.', regex=False), errors='coerce').astype('float64')
+
+
+# Strip stray whitespace from year labels such as "2018-19 "
+def normalize_year(values):
+    return values.astype('string').str.strip()
+
+
+# Index into TIER_COLORS (0 low, 1 medium, 2 high) for each MWh value
+def consumption_tier(mwh):
+    mwh = np.asarray(mwh, dtype=np.float64)
+    return np.select([mwh < LOW_TIER_MAX, mwh <= MEDIUM_TIER_MAX], [0, 1], 2)
+
+
+# Normalize a raw frame and derive the total, MWh and color columns
+def clean_dataset(df):
+    df = df.copy()
+
+    # Convert Latitude and Longitude, replacing commas with dots
+    df['Latitude'] = parse_coordinate(df['Latitude'])
+    df['Longitude'] = parse_coordinate(df['Longitude'])
+
+    # Text columns: one string dtype, normalized year labels as categories
+    df['City'] = df['City'].astype('string')
+    df['Year'] = normalize_year(df['Year']).astype('category')
+
+    # Convert consumption columns to numeric and fill gaps with the mean
+    for col in CATEGORY_COLUMNS + [TOTAL_COLUMN]:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    df[CATEGORY_COLUMNS] = df[CATEGORY_COLUMNS].fillna(df[CATEGORY_COLUMNS].mean())
+
+    return derive_columns(df).reset_index(drop=True)
+
+
+# Recalculate the total and add the MWh and color columns from the categories
+def derive_columns(df):
+    # Recalculate total consumption and convert it to MWh
+    df[TOTAL_COLUMN] = df[CATEGORY_COLUMNS].sum(axis=1)
+    df[MWH_COLUMN] = (df[TOTAL_COLUMN] * 100).round(2)
+
+    # Map color for each consumption tier
+    df['color'] = TIER_COLORS[consumption_tier(df[MWH_COLUMN])].tolist()
+    return df
+
+
+# Files larger than this are streamed in chunks instead of parsed whole
+STREAMING_THRESHOLD = 64 * 1024 * 1024
+
+
+# Read and clean the dataset. Large multi-year extracts go through the chunked
+# ingestion and come back as one row per city (its latest year).
+def load_dataset(path=DATASET_PATH):
+    if os.path.getsize(path) > STREAMING_THRESHOLD:
+        from .ingest import ingest_csv
+        return ingest_csv(path).city_frame()
+    return clean_dataset(pd.read_csv(path, sep=',', dtype=RAW_DTYPES))
+
+
+# Every (City, Year) row of the file, cleaned. Unlike load_dataset, large
+# streamed files keep all their years instead of each city's latest one.
+def load_city_years(path=DATASET_PATH):
+    if os.path.getsize(path) > STREAMING_THRESHOLD:
+        from .ingest import ingest_csv
+        return ingest_csv(path).city_year_frame()
+    return clean_dataset(pd.read_csv(path, sep=',', dtype=RAW_DTYPES))
@@ -0,0 +1,203 @@
+# Incrementally maintained MST over a changing set of cities.
+# Cities can be inserted, deleted or have their Total Consumption (MWh)
+# revised; each operation repairs the current tree instead of rerunning
+# Prim's algorithm over the whole network:
+#   insert: by the cycle property the new MST only uses edges of the old tree
+#           or edges of the new city, so Kruskal over those 2n - 1 edges
+#           (O(n log n)) gives it.
+#   delete: the tree minus the city stays part of the new MST; the pieces
+#           left behind are joined again with their cheapest connecting edges,
+#           which only needs the weight rows of the cities outside the
+#           largest piece (nothing at all when a leaf is deleted).
+#   update: the edges of a city all shift together, so it is detached like a
+#           deletion and attached again like an insertion.
+# Edges and cost stay identical to a full prim_mst recompute (up to ties).
+import numpy as np
+import pandas as pd
+
+from .mst import kruskal, prim_mst, reroot_mst
+from .weights import CONSUMPTION_WEIGHT, DISTANCE_WEIGHT, edge_weights, network_arrays
+
+# Rows of weights computed at once while reconnecting after a deletion
+RECONNECT_BLOCK = 256
+
+
+class DynamicNetwork:
+    def __init__(self, cities, lat, lon, consumption, edges,
+                 distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT):
+        self.cities = list(cities)
+        self.lat = np.array(lat, dtype=np.float64)
+        self.lon = np.array(lon, dtype=np.float64)
+        self.consumption = np.array(consumption, dtype=np.float64)
+        self.distance_weight = distance_weight
+        self.consumption_weight = consumption_weight
+        self._set_edges(edges)
+
+    # Network of the cities in df, starting from an already computed MST when given
+    @classmethod
+    def from_frame(cls, df, edges=None, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT):
+        if edges is None:
+            edges, _, _ = prim_mst(df, distance_weight=distance_weight, consumption_weight=consumption_weight)
+        lat, lon, consumption = network_arrays(df)
+        return cls(df['City'].tolist(), lat, lon, consumption, edges, distance_weight, consumption_weight)
+
+    def _set_edges(self, edges):
+        self.u = np.array([edge[0] for edge in edges], dtype=np.int64)
+        self.v = np.array([edge[1] for edge in edges], dtype=np.int64)
+        self.w = np.array([edge[2] for edge in edges], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.cities)
+
+    # Current MST edges (u, v, weight), indices into self.cities
+    @property
+    def edges(self):
+        return list(zip(self.u.tolist(), self.v.tolist(), self.w.tolist()))
+
+    @property
+    def mst_cost(self):
+        return float(self.w.sum())
+
+    # Current cities as a frame with the columns the MST uses
+    def frame(self):
+        return pd.DataFrame({
+            "City": self.cities,
+            "Latitude": self.lat,
+            "Longitude": self.lon,
+            "Total Consumption (MWh)": self.consumption,
+        })
+
+    # Edges, total cost and path sequence from a starting city, like prim_mst
+    def result(self, start_city_idx=0):
+        return reroot_mst(self.edges, start_city_idx, self.cities)
+
+    def index(self, city):
+        try:
+            return self.cities.index(city)
+        except ValueError:
+            raise KeyError(f"City {city!r} is not in the network.") from None
+
+    def _weights(self, i, j):
+        return edge_weights(self.lat, self.lon, self.consumption, i, j,
+                            self.distance_weight, self.consumption_weight)
+
+    # Connect city k (currently without tree edges) to the tree
+    def _attach(self, k):
+        n = len(self.cities)
+        others = np.delete(np.arange(n), k)
+        u = np.concatenate((self.u, np.full(len(others), k)))
+        v = np.concatenate((self.v, others))
+        w = np.concatenate((self.w, self._weights(k, others)))
+        picked = kruskal(n, u, v, w)
+        self.u, self.v, self.w = u[picked], v[picked], w[picked]
+
+    # Remove the tree edges of city k and reconnect the other cities
+    def _detach(self, k):
+        n = len(self.cities)
+        keep = (self.u != k) & (self.v != k)
+        self.u, self.v, self.w = self.u[keep], self.v[keep], self.w[keep]
+        if n <= 2:
+            return
+
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        graph = coo_matrix((np.ones(len(self.u)), (self.u, self.v)), shape=(n, n))
+        count, labels = connected_components(graph, directed=False)
+        labels[k] = -1
+        if len(np.unique(labels[labels >= 0])) <= 1:
+            return
+
+        # Every edge between two pieces has an endpoint outside the largest one,
+        # so only the weight rows of the other cities (targets, grouped by
+        # piece) are computed. Prim's algorithm over the pieces, starting
+        # from the largest, then picks the len(pieces) - 1 joining edges;
+        # best_* hold the cheapest edge (a, b, weight) from the joined pieces
+        # to every other piece.
+        sizes = np.bincount(labels[labels >= 0], minlength=count)
+        largest = sizes.argmax()
+        order = np.argsort(labels, kind="stable")
+        targets = order[(labels[order] >= 0) & (labels[order] != largest)]
+        target_labels = labels[targets]
+        starts = np.flatnonzero(np.r_[True, target_labels[1:] != target_labels[:-1]])
+        bounds = np.r_[starts, len(targets)]
+        m = len(starts)
+
+        rest = np.flatnonzero(labels == largest)
+        row_w = np.empty(len(targets))
+        row_a = np.empty(len(targets), dtype=np.int64)
+        for start in range(0, len(targets), RECONNECT_BLOCK):
+            block = targets[start:start + RECONNECT_BLOCK]
+            weights = self._weights(block[:, None], rest[None, :])
+            best = weights.argmin(axis=1)
+            row_w[start:start + len(block)] = weights[np.arange(len(block)), best]
+            row_a[start:start + len(block)] = rest[best]
+        best_w, at = _segment_argmin(row_w, starts)
+        best_a, best_b = row_a[at], targets[at]
+
+        joined = np.zeros(m, dtype=bool)
+        u, v, w = [], [], []
+        for _ in range(m):
+            piece = np.where(joined, np.inf, best_w).argmin()
+            joined[piece] = True
+            u.append(best_a[piece])
+            v.append(best_b[piece])
+            w.append(best_w[piece])
+            members = targets[bounds[piece]:bounds[piece + 1]]
+            for start in range(0, len(members), RECONNECT_BLOCK):
+                block = members[start:start + RECONNECT_BLOCK]
+                mins, at = _segment_argmin(self._weights(block[:, None], targets[None, :]), starts)
+                rows = mins.argmin(axis=0)
+                columns = np.arange(m)
+                better = (mins[rows, columns] < best_w) & ~joined
+                best_w[better] = mins[rows, columns][better]
+                best_a[better] = block[rows[better]]
+                best_b[better] = targets[at[rows, columns][better]]
+
+        self.u = np.concatenate((self.u, np.array(u, dtype=np.int64)))
+        self.v = np.concatenate((self.v, np.array(v, dtype=np.int64)))
+        self.w = np.concatenate((self.w, np.array(w, dtype=np.float64)))
+
+    # Add a new city and return its index
+    def insert_city(self, city, latitude, longitude, consumption):
+        if city in self.cities:
+            raise ValueError(f"City {city!r} is already in the network.")
+        self.cities.append(city)
+        self.lat = np.append(self.lat, float(latitude))
+        self.lon = np.append(self.lon, float(longitude))
+        self.consumption = np.append(self.consumption, float(consumption))
+        k = len(self.cities) - 1
+        if k:
+            self._attach(k)
+        return k
+
+    # Remove a city; the indices of the cities after it shift down by one
+    def delete_city(self, city):
+        k = self.index(city)
+        self._detach(k)
+        del self.cities[k]
+        self.lat = np.delete(self.lat, k)
+        self.lon = np.delete(self.lon, k)
+        self.consumption = np.delete(self.consumption, k)
+        self.u = self.u - (self.u > k)
+        self.v = self.v - (self.v > k)
+
+    # Revise the Total Consumption (MWh) of a city
+    def update_consumption(self, city, consumption):
+        k = self.index(city)
+        if len(self.cities) == 1:
+            self.consumption[k] = float(consumption)
+            return
+        self._detach(k)
+        self.consumption[k] = float(consumption)
+        self._attach(k)
+
+
+# Minimum of every segment of the last axis of values (segments start at the
+# positions `starts`) and the position of its first occurrence
+def _segment_argmin(values, starts):
+    mins = np.minimum.reduceat(values, starts, axis=-1)
+    lengths = np.diff(np.r_[starts, values.shape[-1]])
+    columns = np.arange(values.shape[-1])
+    first = np.where(values == np.repeat(mins, lengths, axis=-1), columns, values.shape[-1])
+    return mins, np.minimum.reduceat(first, starts, axis=-1)
@@ -0,0 +1,59 @@
+# Downloadable exports (dataset, rankings, MST edges) in several formats.
+# Each export is written straight to a file in the artifact store, once per
+# dataset version and parameters, and served from disk afterwards.
+from .store import ArtifactStore
+
+# Format -> (file suffix, MIME type)
+EXPORT_FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+}
+FORMAT_LABELS = {"csv": "CSV", "csv.gz": "CSV (gzip)", "parquet": "Parquet", "arrow": "Arrow IPC"}
+
+
+# Write a frame to `path` in one of EXPORT_FORMATS. pandas writes CSV to the
+# file in chunks, so the text is never held in memory as a whole.
+def write_export(frame, path, fmt):
+    if fmt == "csv":
+        frame.to_csv(path, index=False)
+    elif fmt == "csv.gz":
+        # Fixed mtime so the same frame always gives the same bytes
+        frame.to_csv(path, index=False, compression={"method": "gzip", "mtime": 0})
+    elif fmt == "parquet":
+        frame.to_parquet(path, index=False)
+    elif fmt == "arrow":
+        # Feather v2 is the Arrow IPC file format
+        frame.reset_index(drop=True).to_feather(path)
+    else:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+
+
+# Path of the export `name` for the given key parts (dataset version and the
+# parameters the table depends on) and format; build() returns the frame and
+# is only called when the file is not in the store yet
+def cached_export(name, key_parts, build, fmt, store=None):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    store = store or ArtifactStore()
+    path = store.path('export', f"{name}_{store.key(*key_parts, fmt)}", EXPORT_FORMATS[fmt][0])
+    if not path.exists():
+        store.write_atomic(path, lambda tmp: write_export(build(), tmp, fmt))
+    return path
+
+
+# Cleaned dataset as the Data page offers it (numbers rounded to 2 decimals)
+def export_dataset(df, source_hash, fmt="csv", store=None):
+    return cached_export('dataset', (source_hash,), lambda: df.round(2), fmt, store)
+
+
+# Ranking of one category, from ConsumptionAnalytics
+def export_ranking(analytics, label, source_hash, fmt="csv", store=None):
+    return cached_export('ranking', (source_hash, label), lambda: analytics.ranking(label), fmt, store)
+
+
+# MST edge table (city names and weights); tree_parts identify the tree, e.g.
+# the weight split and the starting city
+def export_edges(edges, source_hash, tree_parts, fmt="csv", store=None):
+    return cached_export('edges', (source_hash, *tree_parts), lambda: edges, fmt, store)
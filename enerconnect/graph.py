@@ -0,0 +1,118 @@
+# Compact stores for the pairwise graph. A complete graph over n cities is
+# kept as its condensed upper triangle (n * (n - 1) / 2 float32 values, about
+# 200 MB for 10,000 cities) and a sparse candidate graph as CSR arrays. Both
+# answer weight lookups with NumPy indexing, without per-edge Python objects.
+import numpy as np
+
+from .mst import PROGRESS_STEPS
+from .weights import CONSUMPTION_WEIGHT, DISTANCE_WEIGHT, condensed_index, edge_weights, network_arrays
+
+COMPACT_DTYPE = np.float32
+
+
+class CondensedGraph:
+    def __init__(self, n, data):
+        if len(data) != n * (n - 1) // 2:
+            raise ValueError(f"Condensed array of length {len(data)} does not match {n} cities.")
+        self.n = n
+        self.data = data
+
+    # Build from the cities in df one row at a time, so peak memory is the
+    # condensed array itself. With `path` the array is written to a .npy file
+    # and memory-mapped instead of held in RAM. progress, if given, is called
+    # now and then with the fraction of weights computed so far.
+    @classmethod
+    def from_frame(cls, df, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT,
+                   dtype=COMPACT_DTYPE, path=None, progress=None):
+        lat, lon, consumption = network_arrays(df)
+        n = len(lat)
+        size = n * (n - 1) // 2
+        if path is None:
+            data = np.empty(size, dtype=dtype)
+        else:
+            data = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(size,))
+
+        start = 0
+        step = max(1, (n - 1) // PROGRESS_STEPS)
+        for i in range(n - 1):
+            j = np.arange(i + 1, n)
+            data[start:start + len(j)] = edge_weights(lat, lon, consumption, i, j, distance_weight, consumption_weight)
+            start += len(j)
+            if progress is not None and (i + 1) % step == 0:
+                progress(start / size)
+
+        if path is not None:
+            data.flush()
+        return cls(n, data)
+
+    # Open a graph saved by from_frame(path=...) or np.save, memory-mapped
+    @classmethod
+    def load(cls, path, n, mmap=True):
+        return cls(n, np.load(path, mmap_mode='r' if mmap else None))
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    # Weight of one edge, or of many edges given index arrays
+    def weight(self, i, j):
+        return self.data[condensed_index(self.n, np.asarray(i), np.asarray(j))]
+
+    # Weights from city i to every city (0 for i itself)
+    def row(self, i):
+        row = np.empty(self.n, dtype=self.data.dtype)
+        before = np.arange(i)
+        row[:i] = self.data[condensed_index(self.n, before, i)]
+        row[i] = 0
+        start = condensed_index(self.n, i, i + 1) if i < self.n - 1 else len(self.data)
+        row[i + 1:] = self.data[start:start + self.n - i - 1]
+        return row
+
+    # Expand to the dense n x n matrix (only sensible for small n)
+    def to_dense(self):
+        dense = np.zeros((self.n, self.n), dtype=self.data.dtype)
+        rows, cols = np.triu_indices(self.n, k=1)
+        dense[rows, cols] = self.data
+        dense[cols, rows] = self.data
+        return dense
+
+
+# Sparse graph in CSR form, with the column indices of every row sorted
+class CSRGraph:
+    def __init__(self, indptr, indices, data):
+        self.n = len(indptr) - 1
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data)
+
+    # Sort each row by column index and store the weights compactly
+    @classmethod
+    def from_arrays(cls, indptr, indices, data, dtype=COMPACT_DTYPE):
+        indptr = np.asarray(indptr, dtype=np.int64)
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        order = np.lexsort((indices, rows))
+        return cls(indptr, np.asarray(indices)[order], np.asarray(data, dtype=dtype)[order])
+
+    def to_arrays(self):
+        return self.indptr, self.indices, self.data
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    # Neighbours of city i and the weights of the edges to them
+    def neighbours(self, i):
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:stop], self.data[start:stop]
+
+    # Weight of the edge (i, j), or inf when it is not in the graph
+    def weight(self, i, j):
+        neighbours, weights = self.neighbours(i)
+        k = np.searchsorted(neighbours, j)
+        if k < len(neighbours) and neighbours[k] == j:
+            return weights[k]
+        return np.inf
@@ -0,0 +1,109 @@
+# Streaming ingestion of large consumption extracts (per meter, per circle,
+# many years). Files are read in chunks and folded into running per-city/
+# per-year aggregates, so peak memory depends on the chunk size and the number
+# of (City, Year) groups, never on the file size.
+import pandas as pd
+
+from .dataset import (
+    CATEGORY_COLUMNS,
+    MWH_COLUMN,
+    RAW_DTYPES,
+    TOTAL_COLUMN,
+    derive_columns,
+    normalize_year,
+    parse_coordinate,
+)
+
+DEFAULT_CHUNKSIZE = 100_000
+
+KEYS = ['City', 'Year']
+COLUMNS = KEYS + CATEGORY_COLUMNS + ['Latitude', 'Longitude']
+
+# Column order of the cleaned dataset, which the pages expect
+OUTPUT_COLUMNS = KEYS + CATEGORY_COLUMNS + [TOTAL_COLUMN, 'Latitude', 'Longitude', MWH_COLUMN, 'color']
+
+
+# Running sums and non-null counts per (City, Year) group
+class ConsumptionAggregator:
+    def __init__(self):
+        self._state = None
+        self._order = {}  # (City, Year) -> position of first appearance
+        self.rows = 0
+
+    # Normalize one raw chunk and fold it into the running aggregates
+    def add(self, chunk):
+        parts = {
+            'City': chunk['City'].astype('string'),
+            'Year': normalize_year(chunk['Year']),
+            'rows': 1,
+        }
+        for col in CATEGORY_COLUMNS:
+            values = pd.to_numeric(chunk[col], errors='coerce')
+            parts[col] = values
+            parts[col + ':count'] = values.notna()
+        for col in ['Latitude', 'Longitude']:
+            values = parse_coordinate(chunk[col])
+            parts[col] = values
+            parts[col + ':count'] = values.notna()
+
+        partial = pd.DataFrame(parts).groupby(KEYS, sort=False).sum(min_count=0)
+        for key in partial.index:
+            self._order.setdefault(key, len(self._order))
+        if self._state is None:
+            self._state = partial
+        else:
+            self._state = self._state.add(partial, fill_value=0)
+        self.rows += len(chunk)
+        return self
+
+    # Consumption per (City, Year) with gaps filled by the mean over all rows,
+    # exactly as if the whole file had been loaded and cleaned at once
+    def city_year_frame(self):
+        if self._state is None:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
+        state = self._state
+        df = pd.DataFrame(index=state.index)
+        for col in CATEGORY_COLUMNS:
+            count = state[col + ':count']
+            mean = state[col].sum() / count.sum()
+            df[col] = state[col] + (state['rows'] - count) * mean
+        for col in ['Latitude', 'Longitude']:
+            df[col] = state[col] / state[col + ':count']
+
+        position = df.index.map(self._order.__getitem__)
+        df = df.iloc[position.argsort()].reset_index()
+        df['City'] = df['City'].astype('string')
+        df['Year'] = df['Year'].astype('category')
+        return derive_columns(df)[OUTPUT_COLUMNS]
+
+    # City-level frame in the shape of the cleaned dataset: one row per city,
+    # for the given year or, by default, each city's latest year
+    def city_frame(self, year=None):
+        df = self.city_year_frame()
+        years = df['Year'].astype('string')
+        if year is not None:
+            df = df[years == year]
+        else:
+            df = df[years == years.groupby(df['City'], sort=False).transform('max')]
+        return df.reset_index(drop=True)
+
+    # Per-year totals of every category
+    def by_year(self):
+        return self.city_year_frame().groupby('Year', observed=True)[CATEGORY_COLUMNS + [TOTAL_COLUMN]].sum()
+
+    # Per-city totals of every category, summed over all years
+    def by_city(self):
+        return self.city_year_frame().groupby('City')[CATEGORY_COLUMNS + [TOTAL_COLUMN]].sum()
+
+
+# Stream one or more CSV files through an aggregator, chunk by chunk
+def ingest_csv(paths, chunksize=DEFAULT_CHUNKSIZE, aggregator=None):
+    if isinstance(paths, (str, bytes)) or hasattr(paths, '__fspath__'):
+        paths = [paths]
+    aggregator = aggregator or ConsumptionAggregator()
+    for path in paths:
+        reader = pd.read_csv(path, sep=',', usecols=COLUMNS, dtype=RAW_DTYPES, chunksize=chunksize)
+        with reader:
+            for chunk in reader:
+                aggregator.add(chunk)
+    return aggregator
@@ -0,0 +1,94 @@
+# Lightweight per-stage instrumentation: wall time for every stage, plus
+# optional tracemalloc peak memory and cProfile output. One Instrumentation
+# collects the stages of one page rerun (or one batch run) and can be dumped
+# as a structured JSON log line.
+import cProfile
+import io
+import json
+import logging
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger("enerconnect.timing")
+
+# Number of functions kept from each stage profile
+PROFILE_LINES = 15
+
+
+class Instrumentation:
+    def __init__(self, name, trace_memory=False, profile=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.started = time.perf_counter()
+        self.stages = []
+        self.cache = {}  # cache name -> {"hits": int, "misses": int}
+        self._peaks = []  # Peak memory seen so far by each open stage, outermost first
+
+    # Time the enclosed block as one stage. Stages may nest: a nested stage
+    # resets the tracemalloc peak for its own measurement, so the peak seen
+    # by the enclosing stage until then is kept on a stack and combined with
+    # the nested stage's peak when it exits.
+    @contextmanager
+    def stage(self, name):
+        record = {"stage": name}
+        profiler = cProfile.Profile() if self.profile else None
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        if self.trace_memory:
+            self._peaks.append(0)
+        if profiler:
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - started
+            if profiler:
+                profiler.disable()
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+                record["profile"] = out.getvalue()
+            if self.trace_memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record["peak_bytes"] = peak
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stages.append(record)
+
+    def count(self, cache, hit):
+        counts = self.cache.setdefault(cache, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    # Structured summary, without the (long) profile texts
+    def summary(self):
+        return {
+            "name": self.name,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "total_seconds": self.total_seconds,
+            "stages": [{key: value for key, value in stage.items() if key != "profile"} for stage in self.stages],
+            "cache": self.cache,
+        }
+
+    # Emit the summary as one JSON log line, and append it to `path` if given
+    def dump(self, path=None):
+        line = json.dumps(self.summary())
+        logger.info(line)
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return line
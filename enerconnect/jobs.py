@@ -0,0 +1,118 @@
+# Background jobs shared by every session of the server. A JobCache runs
+# functions on a pool of worker threads, keyed by whatever identifies their
+# result (for the MST: dataset version and weight split). Submitting a key
+# that is already queued, running or finished returns the same Job, so the
+# same request from many sessions is computed once. Jobs report their
+# progress and, where they have one, a partial result the pages can show
+# while they wait.
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent import futures
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Finished jobs kept for later requests; running jobs are never evicted
+DEFAULT_MAX_ENTRIES = 64
+
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.fraction = 0.0  # Progress between 0 and 1
+        self.message = "Queued"
+        self.partial = None  # Latest partial result reported by the job
+        self.requests = 1  # Submissions coalesced into this job
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.future = None
+
+    # Passed to the job function as its first argument
+    def report(self, fraction, message=None, partial=None):
+        self.fraction = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    # Wait up to `timeout` seconds for the job to finish; returns done
+    def wait(self, timeout=None):
+        futures.wait([self.future], timeout)
+        return self.done
+
+    # Result of the job, waiting up to `timeout` seconds; re-raises its error
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    # Seconds spent waiting for a worker and running (None until known)
+    @property
+    def queue_seconds(self):
+        return None if self.started is None else self.started - self.submitted
+
+    @property
+    def run_seconds(self):
+        return None if self.finished is None else self.finished - self.started
+
+
+class JobCache:
+    def __init__(self, workers=DEFAULT_WORKERS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.computations = 0  # Jobs actually started, as opposed to coalesced
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="enerconnect-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._jobs
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+    # Job for `key`, starting fn(report, *args, **kwargs) on a worker when no
+    # job with that key is queued, running or kept finished. Failed jobs are
+    # dropped once they finish, so the next submission retries.
+    def submit(self, key, fn, *args, **kwargs):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                job.requests += 1
+                self._jobs.move_to_end(key)
+                return job
+            job = self._jobs[key] = Job(key)
+            self.computations += 1
+            job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+            self._evict()
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.started = time.perf_counter()
+        job.report(0.0, "Running")
+        try:
+            result = fn(job.report, *args, **kwargs)
+        except BaseException:
+            with self._lock:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+            raise
+        finally:
+            job.finished = time.perf_counter()
+        job.report(1.0, "Done")
+        job.partial = None
+        return result
+
+    # Drop the least recently requested finished jobs beyond max_entries
+    def _evict(self):
+        excess = len(self._jobs) - self.max_entries
+        for key in [key for key, job in self._jobs.items() if job.future.done()][:max(excess, 0)]:
+            del self._jobs[key]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
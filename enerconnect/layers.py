@@ -0,0 +1,154 @@
+# Vector network layers (substation points, transmission lines, state
+# boundaries) read from local GeoJSON or GeoParquet files, and their spatial
+# joins to the cities. geopandas is only imported when a layer is used.
+# Every lookup goes through an index, so none compares all pairs and layers
+# of hundreds of thousands of features stay fast. City-in-polygon joins query
+# the layer's R-tree (GeoDataFrame.sindex, built once when the layer is
+# read). Nearest substations and line snapping use SpatialIndex, whose k-d
+# tree over the unit sphere gives exact great-circle nearest neighbours.
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .spatial import SpatialIndex
+
+# Layers are converted to WGS 84 longitude/latitude, the reference system of
+# the dataset's Latitude/Longitude columns
+LAYER_CRS = "EPSG:4326"
+
+GEOPARQUET_SUFFIXES = (".parquet", ".geoparquet")
+
+# Line vertices further than this from every city are not snapped to one
+DEFAULT_SNAP_KM = 10.0
+
+# Margin (degrees) around the cities when reading a layer by bounding box
+DEFAULT_BBOX_MARGIN = 1.0
+
+
+# Bounding box (min lon, min lat, max lon, max lat) around the cities of df
+def city_bounds(df, margin=DEFAULT_BBOX_MARGIN):
+    lat = df['Latitude'].to_numpy(dtype=np.float64)
+    lon = df['Longitude'].to_numpy(dtype=np.float64)
+    return lon.min() - margin, lat.min() - margin, lon.max() + margin, lat.max() + margin
+
+
+# CRS of a GeoParquet file from its "geo" metadata (OGC:CRS84 when absent),
+# and whether it can be read by bounding box (it has a bbox covering column
+# or point encoding)
+def _parquet_geo(path):
+    import pyarrow.parquet as pq
+
+    geo = json.loads(pq.read_schema(path).metadata[b"geo"])
+    column = geo["columns"][geo["primary_column"]]
+    return column.get("crs", "OGC:CRS84"), "covering" in column or column.get("encoding") == "point"
+
+
+# GeoDataFrame of a GeoJSON or GeoParquet file (or anything else geopandas
+# reads) in LAYER_CRS, with its R-tree built. With bbox (in LAYER_CRS, e.g.
+# from city_bounds) only the features intersecting it are kept; files with a
+# spatial index, a GeoParquet bbox column or point encoding skip the rest
+# without parsing it.
+def read_layer(path, bbox=None):
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    path = Path(path)
+    area = None if bbox is None else gpd.GeoSeries([box(*bbox)], crs=LAYER_CRS)
+    if path.suffix.lower() in GEOPARQUET_SUFFIXES:
+        crs, filterable = _parquet_geo(path) if area is not None else (None, False)
+        layer = gpd.read_parquet(path, bbox=tuple(area.to_crs(crs).total_bounds) if filterable else None)
+    else:
+        layer = gpd.read_file(path, bbox=area)
+    if layer.crs is None:
+        layer = layer.set_crs(LAYER_CRS)
+    elif layer.crs.to_epsg() != 4326:
+        layer = layer.to_crs(LAYER_CRS)
+    if area is not None:
+        layer = layer.iloc[np.sort(layer.sindex.query(area.iloc[0], predicate='intersects'))]
+    layer.sindex  # Built lazily by geopandas; build it once here
+    return layer
+
+
+# Cities of df as a point GeoDataFrame (same row order)
+def city_points(df):
+    import geopandas as gpd
+
+    return gpd.GeoDataFrame(
+        {'City': df['City'].to_numpy(dtype=object)},
+        geometry=gpd.points_from_xy(df['Longitude'].to_numpy(dtype=np.float64),
+                                    df['Latitude'].to_numpy(dtype=np.float64)),
+        crs=LAYER_CRS,
+    )
+
+
+# Value of `column` of the polygon (e.g. the state) containing each city,
+# None outside every polygon. A city on a shared border takes the first
+# polygon in layer order.
+def join_polygons(df, polygons, column):
+    import geopandas as gpd
+
+    joined = gpd.sjoin(city_points(df), polygons[[column, 'geometry']], how='left', predicate='intersects')
+    joined = joined.sort_values('index_right', kind="stable")
+    joined = joined[~joined.index.duplicated()].sort_index()
+    return joined[column].astype(object).where(joined[column].notna(), None).to_numpy()
+
+
+# Latitude and longitude of a layer's features (representative points for
+# anything that is not a point)
+def _layer_coordinates(layer):
+    geometry = layer.geometry
+    if not (geometry.geom_type == 'Point').all():
+        geometry = geometry.representative_point()
+    return geometry.y.to_numpy(dtype=np.float64), geometry.x.to_numpy(dtype=np.float64)
+
+
+# Position of the nearest feature of `points` (e.g. a substation) to each
+# city and the great-circle distance to it in km
+def nearest_points(df, points):
+    index = SpatialIndex(*_layer_coordinates(points))
+    distances, positions = index.nearest(df['Latitude'].to_numpy(dtype=np.float64),
+                                         df['Longitude'].to_numpy(dtype=np.float64), k=1)
+    return positions[:, 0], distances[:, 0]
+
+
+# One row per city with its state and nearest substation, for whichever of
+# the layers is given. state_column / substation_column name the attribute
+# shown for a state or substation; without substation_column the
+# substation's row position in its layer is shown.
+def join_layers(df, states=None, state_column='name', substations=None, substation_column=None):
+    joined = pd.DataFrame({'City': df['City'].to_numpy(dtype=object)})
+    if states is not None:
+        joined['State'] = join_polygons(df, states, state_column)
+    if substations is not None:
+        positions, distances = nearest_points(df, substations)
+        labels = positions if substation_column is None else substations[substation_column].to_numpy()[positions]
+        joined['Substation'] = labels
+        joined['Substation Distance (km)'] = distances.round(3)
+    return joined
+
+
+# City pairs linked by existing lines, as (u, v) index arrays for prim_mst.
+# Every line vertex is snapped to its nearest city within snap_km, and
+# consecutive distinct cities along each line (or part of a multi-line) are
+# linked, so a line passing several cities links them in order.
+def line_links(df, lines, snap_km=DEFAULT_SNAP_KM):
+    import shapely
+
+    parts = lines.geometry.explode(index_parts=False)
+    parts = parts[parts.geom_type == 'LineString'].to_numpy()
+    coordinates, part = shapely.get_coordinates(parts, return_index=True)
+    if not len(coordinates):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    distances, cities = SpatialIndex.from_frame(df).nearest(coordinates[:, 1], coordinates[:, 0], k=1)
+    snapped = distances[:, 0] <= snap_km
+    cities, part = cities[snapped, 0].astype(np.int64), part[snapped]
+    linked = (part[1:] == part[:-1]) & (cities[1:] != cities[:-1])
+    u, v = cities[:-1][linked], cities[1:][linked]
+
+    # Each undirected pair once
+    n = len(df)
+    pairs = np.unique(np.minimum(u, v) * n + np.maximum(u, v))
+    return pairs // n, pairs % n
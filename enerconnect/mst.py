@@ -0,0 +1,324 @@
+import heapq
+
+import numpy as np
+
+from .spatial import SpatialIndex
+from .weights import CONSUMPTION_WEIGHT, DISTANCE_WEIGHT, edge_weights, network_arrays
+
+# Above this many cities the complete graph is no longer built and the MST is
+# computed over a k-nearest-neighbour candidate graph instead
+SPARSE_THRESHOLD = 5000
+
+# Number of nearest neighbours each city is connected to in the candidate graph
+DEFAULT_NEIGHBOURS = 10
+
+# Number of lowest-consumption cities every city is also connected to. The
+# consumption term makes these the cheapest endpoints regardless of distance,
+# so the exact MST tends to use them as hubs that k-nearest edges would miss.
+DEFAULT_HUBS = 30
+
+# Long-running loops call their progress callback about this many times
+PROGRESS_STEPS = 100
+
+# Cost of an edge along an existing line (see enerconnect.layers.line_links)
+DEFAULT_LINE_COST = 0.0
+
+
+# Array-based Prim's algorithm: O(n^2) time and O(n) extra memory.
+# `row` returns the weights from one city to every city, so it can either
+# index a dense weight matrix or compute the row on the fly.
+# Returns the MST edges (u, v, weight) in the order they were added.
+# progress, if given, is called now and then with the edges added so far.
+def prim_dense(n, row, start_city_idx=0, progress=None):
+    visited = np.zeros(n, dtype=bool)
+    best = np.full(n, np.inf)  # Cheapest known edge into each unvisited city
+    parent = np.full(n, -1)  # Visited city on the other end of that edge
+    edges = []
+    step = max(1, (n - 1) // PROGRESS_STEPS)
+
+    u = start_city_idx
+    visited[u] = True
+    for i in range(n - 1):
+        weights = np.asarray(row(u), dtype=np.float64)
+        closer = ~visited & (weights < best)
+        best[closer] = weights[closer]
+        parent[closer] = u
+
+        v = int(np.argmin(np.where(visited, np.inf, best)))
+        edges.append((int(parent[v]), v, float(best[v])))
+        visited[v] = True
+        u = v
+        if progress is not None and (i + 1) % step == 0:
+            progress(edges)
+
+    return edges
+
+
+# Heap-based Prim's algorithm over a CSRGraph (see enerconnect.graph):
+# O(E log V). The graph must be undirected (symmetric) and connected.
+# progress is called like in prim_dense.
+def prim_heap(graph, start_city_idx=0, progress=None):
+    n = graph.n
+    indptr, indices, data = (array.tolist() for array in graph.to_arrays())
+    visited = [False] * n
+    best = [float('inf')] * n  # Cheapest edge pushed so far for each city
+    edges = []
+    step = max(1, (n - 1) // PROGRESS_STEPS)
+
+    heap = [(0.0, -1, start_city_idx)]
+    while heap and len(edges) < n - 1:
+        weight, u, v = heapq.heappop(heap)
+        if visited[v]:
+            continue
+        visited[v] = True
+        if u >= 0:
+            edges.append((u, v, weight))
+            if progress is not None and len(edges) % step == 0:
+                progress(edges)
+        for k in range(indptr[v], indptr[v + 1]):
+            x = indices[k]
+            # Only push edges that improve on what is already queued for x
+            if not visited[x] and data[k] < best[x]:
+                best[x] = data[k]
+                heapq.heappush(heap, (data[k], v, x))
+
+    if len(edges) < n - 1:
+        raise ValueError("Candidate graph is not connected.")
+    return edges
+
+
+# Add the cheapest nearby edge leaving each connected component until the
+# candidate graph is connected (Boruvka style, so the component count at least
+# halves every round)
+def _bridge_components(index, weight_fn, rows, cols):
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    n = len(index)
+    while True:
+        graph = coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+        count, labels = connected_components(graph, directed=False)
+        if count == 1:
+            return rows, cols
+
+        order = np.argsort(labels, kind="stable")
+        groups = np.split(order, np.cumsum(np.bincount(labels, minlength=count))[:-1])
+        new_rows, new_cols = [], []
+        for label, members in enumerate(groups):
+            k = 2
+            while True:
+                k = min(k, n)
+                _, neighbours = index.tree.query(index.points[members], k=k)
+                source = np.repeat(members, k)
+                target = neighbours.ravel()
+                outside = labels[target] != label
+                if outside.any() or k == n:
+                    break
+                k *= 2
+            source, target = source[outside], target[outside]
+            best = int(np.argmin(weight_fn(source, target)))
+            new_rows.append(source[best])
+            new_cols.append(target[best])
+
+        rows = np.concatenate((rows, new_rows))
+        cols = np.concatenate((cols, new_cols))
+
+
+# Sparse candidate graph linking every city to its k nearest neighbours
+# (great-circle distance, from the spatial index) and to the `hubs`
+# lowest-consumption cities, bridged so that it is always connected.
+# A prebuilt SpatialIndex over the same cities can be passed in. City pairs
+# linked by existing lines (u, v index arrays) are added to the graph and
+# cost at most line_cost.
+# Returns a symmetric CSRGraph with float64 weights.
+def candidate_graph(df, k=DEFAULT_NEIGHBOURS, hubs=DEFAULT_HUBS,
+                    distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT, index=None,
+                    lines=None, line_cost=DEFAULT_LINE_COST):
+    lat, lon, consumption = network_arrays(df)
+    n = len(lat)
+
+    def weight_fn(i, j):
+        return edge_weights(lat, lon, consumption, i, j, distance_weight, consumption_weight)
+
+    if index is None:
+        index = SpatialIndex(lat, lon)
+    rows, cols = index.neighbour_pairs(k)
+    if hubs:
+        hub_idx = np.argsort(consumption, kind="stable")[:hubs]
+        rows = np.concatenate((rows, np.repeat(np.arange(n), len(hub_idx))))
+        cols = np.concatenate((cols, np.tile(hub_idx, n)))
+    if lines is not None:
+        rows = np.concatenate((rows, np.asarray(lines[0], dtype=np.int64)))
+        cols = np.concatenate((cols, np.asarray(lines[1], dtype=np.int64)))
+    rows, cols = _bridge_components(index, weight_fn, rows, cols)
+
+    # Keep each undirected pair once, then mirror it
+    i, j = np.minimum(rows, cols), np.maximum(rows, cols)
+    pairs = np.unique(i.astype(np.int64) * n + j)
+    i, j = pairs // n, pairs % n
+    keep = i != j
+    i, j = i[keep], j[keep]
+    weights = weight_fn(i, j)
+    if lines is not None:
+        weights = _line_weights(line_keys(n, lines), n, i, j, weights, line_cost)
+
+    return _symmetric_csr(n, i, j, weights)
+
+
+# Symmetric CSRGraph (float64 weights) with the undirected edges (u, v, w).
+# enerconnect.graph imports this module, so it is imported here on use.
+def _symmetric_csr(n, u, v, w):
+    from .graph import CSRGraph
+
+    sources = np.concatenate((u, v))
+    order = np.argsort(sources, kind="stable")
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=n))))
+    return CSRGraph.from_arrays(indptr, np.concatenate((v, u))[order], np.concatenate((w, w))[order],
+                                dtype=np.float64)
+
+
+# Prim's Algorithm for MST over the cities in df.
+# mode="dense" runs the exact O(n^2) Prim, over `weights` when a weight matrix
+# or a graph store with a row() method (see enerconnect.graph) is given,
+# otherwise computing one row at a time. Weights read from a reduced
+# precision store are recomputed in float64 for the chosen edges, so the
+# reported costs stay exact.
+# mode="sparse" runs heap-based Prim over the candidate graph (see
+# candidate_graph), which is much faster but may be slightly off the optimum;
+# use mst_gap to measure by how much.
+# mode="auto" picks sparse above SPARSE_THRESHOLD cities, dense otherwise.
+# lines (u, v index arrays) are pairs of cities already linked by existing
+# lines; their edges cost at most line_cost, so the tree reuses them.
+# progress is passed on to prim_dense / prim_heap.
+# Returns the edges, total cost and path sequence (pairs of city names).
+def prim_mst(df, start_city_idx=0, weights=None, mode="dense", k=DEFAULT_NEIGHBOURS, hubs=DEFAULT_HUBS,
+             distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT, progress=None,
+             lines=None, line_cost=DEFAULT_LINE_COST):
+    n = len(df)
+    if mode == "auto":
+        mode = "sparse" if n > SPARSE_THRESHOLD else "dense"
+    if mode == "dense":
+        if weights is None:
+            lat, lon, consumption = network_arrays(df)
+            cities = np.arange(n)
+
+            def row(u):
+                return edge_weights(lat, lon, consumption, u, cities, distance_weight, consumption_weight)
+        else:
+            row = weights.row if hasattr(weights, 'row') else weights.__getitem__
+        if lines is not None:
+            row = _with_lines(row, n, lines, line_cost)
+        edges = prim_dense(n, row, start_city_idx, progress)
+        if weights is not None and weights.dtype != np.float64 and edges:
+            edges = _exact_weights(df, edges, distance_weight, consumption_weight, lines, line_cost)
+    elif mode == "sparse":
+        graph = candidate_graph(df, k, hubs, distance_weight, consumption_weight, lines=lines, line_cost=line_cost)
+        edges = prim_heap(graph, start_city_idx, progress)
+    else:
+        raise ValueError(f"Unknown MST mode: {mode!r}")
+
+    cities = df['City'].tolist()
+    path = [(cities[u], cities[v]) for u, v, _ in edges]
+    mst_cost = sum(weight for _, _, weight in edges)
+    return edges, mst_cost, path
+
+
+# Same edges with their weights recomputed in float64
+def _exact_weights(df, edges, distance_weight, consumption_weight, lines=None, line_cost=DEFAULT_LINE_COST):
+    lat, lon, consumption = network_arrays(df)
+    u = np.array([edge[0] for edge in edges])
+    v = np.array([edge[1] for edge in edges])
+    weights = edge_weights(lat, lon, consumption, u, v, distance_weight, consumption_weight)
+    if lines is not None:
+        weights = _line_weights(line_keys(len(lat), lines), len(lat), u, v, weights, line_cost)
+    return list(zip(u.tolist(), v.tolist(), weights.tolist()))
+
+
+# Sorted keys (i * n + j with i < j) of the city pairs linked by lines
+def line_keys(n, lines):
+    u = np.asarray(lines[0], dtype=np.int64)
+    v = np.asarray(lines[1], dtype=np.int64)
+    keep = u != v
+    return np.unique(np.minimum(u, v)[keep] * n + np.maximum(u, v)[keep])
+
+
+# Weights of the edges (i, j), capped at line_cost where a line links them
+def _line_weights(keys, n, i, j, weights, line_cost):
+    linked = np.isin(np.minimum(i, j) * n + np.maximum(i, j), keys)
+    return np.where(linked, np.minimum(weights, line_cost), weights)
+
+
+# Row function of prim_dense with the edges along lines capped at line_cost
+def _with_lines(row, n, lines, line_cost):
+    keys = line_keys(n, lines)
+    i, j = keys // n, keys % n
+    sources = np.concatenate((i, j))
+    targets = np.concatenate((j, i))[np.argsort(sources, kind="stable")]
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=n))))
+
+    def lined_row(u):
+        weights = np.array(row(u), dtype=np.float64)
+        linked = targets[indptr[u]:indptr[u + 1]]
+        weights[linked] = np.minimum(weights[linked], line_cost)
+        return weights
+    return lined_row
+
+
+# Kruskal's algorithm over an explicit edge list (u, v, weight arrays) on n
+# vertices: O(E log E). Returns the positions of the spanning forest edges
+# in the input arrays, in the order they were picked.
+def kruskal(n, u, v, weights):
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    picked = []
+    order = np.argsort(weights, kind="stable")
+    for position, a, b in zip(order.tolist(), u[order].tolist(), v[order].tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_a] = root_b
+            picked.append(position)
+            if len(picked) == n - 1:
+                break
+    return np.array(picked, dtype=np.int64)
+
+
+# CSRGraph (float64 weights) of the undirected tree given by edges
+def tree_csr(edges, n):
+    u = np.fromiter((e[0] for e in edges), dtype=np.int64, count=len(edges))
+    v = np.fromiter((e[1] for e in edges), dtype=np.int64, count=len(edges))
+    w = np.fromiter((e[2] for e in edges), dtype=np.float64, count=len(edges))
+    return _symmetric_csr(n, u, v, w)
+
+
+# Re-root an already computed MST at another starting city.
+# The weights do not depend on the starting city, so Prim's algorithm from
+# any city picks the same tree; only the order and orientation of the edges
+# change. Running Prim over the n-1 tree edges alone reproduces that order in
+# O(n log n) without touching the full graph.
+# Returns the edges, total cost and path sequence like prim_mst.
+def reroot_mst(tree_edges, start_city_idx, cities):
+    edges = prim_heap(tree_csr(tree_edges, len(cities)), start_city_idx)
+    path = [(cities[u], cities[v]) for u, v, _ in edges]
+    mst_cost = sum(weight for _, _, weight in edges)
+    return edges, mst_cost, path
+
+
+# How far an approximate (candidate graph) MST is from the exact one.
+# The exact cost is computed row by row, so no n x n matrix is allocated.
+def mst_gap(df, mst_cost, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT,
+            lines=None, line_cost=DEFAULT_LINE_COST):
+    _, exact_cost, _ = prim_mst(df, mode="dense", distance_weight=distance_weight, consumption_weight=consumption_weight,
+                                lines=lines, line_cost=line_cost)
+    absolute_gap = mst_cost - exact_cost
+    return {
+        "exact_cost": exact_cost,
+        "approximate_cost": mst_cost,
+        "absolute_gap": absolute_gap,
+        "relative_gap": absolute_gap / exact_cost if exact_cost else 0.0,
+    }
@@ -0,0 +1,120 @@
+# Path queries over a spanning tree (the MST edges from prim_mst).
+# The tree is rooted once; every city stores its depth, the cumulative cost
+# from the root and binary-lifting tables of its 2^k-th ancestor together with
+# the heaviest edge on the way there. The lowest common ancestor of two cities
+# then takes O(log n) steps, and with it the hop count, total cost and
+# bottleneck edge of the route between them. Batch queries run the lifting
+# steps on whole arrays of city pairs at once.
+import numpy as np
+
+from .mst import tree_csr
+
+
+class PathIndex:
+    def __init__(self, edges, n, root=0):
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import breadth_first_order
+
+        self.n = n
+        self.root = root
+        indptr, indices, data = tree_csr(edges, n).to_arrays()
+        graph = csr_matrix((data, indices, indptr), shape=(n, n))
+        order, parent = breadth_first_order(graph, root, directed=False, return_predecessors=True)
+        if len(order) != n:
+            raise ValueError("The edges do not form a spanning tree.")
+        parent[root] = root
+        self.parent = parent.astype(np.int64)
+
+        # Weight of the edge from each city up to its parent
+        u = np.array([edge[0] for edge in edges], dtype=np.int64)
+        v = np.array([edge[1] for edge in edges], dtype=np.int64)
+        w = np.array([edge[2] for edge in edges], dtype=np.float64)
+        child = np.where(self.parent[v] == u, v, u)
+        self.parent_weight = np.full(n, -np.inf)
+        self.parent_weight[child] = w
+
+        # Depth and cumulative cost from the root, filled in BFS order
+        self.depth = np.zeros(n, dtype=np.int64)
+        self.cost = np.zeros(n, dtype=np.float64)
+        depth, cost, parents, weights = self.depth, self.cost, self.parent, self.parent_weight
+        for node in order[1:].tolist():
+            depth[node] = depth[parents[node]] + 1
+            cost[node] = cost[parents[node]] + weights[node]
+
+        # up[k][x]: 2^k-th ancestor of x (the root is its own ancestor);
+        # heaviest[k][x]: heaviest edge weight on that climb, and
+        # heaviest_child[k][x] the city below that edge
+        levels = max(1, int(self.depth.max()).bit_length())
+        self.up = [self.parent]
+        self.heaviest = [self.parent_weight]
+        self.heaviest_child = [np.arange(n, dtype=np.int64)]
+        for _ in range(1, levels):
+            up, heaviest, heaviest_child = self.up[-1], self.heaviest[-1], self.heaviest_child[-1]
+            upper = heaviest[up]
+            take_upper = upper > heaviest
+            self.up.append(up[up])
+            self.heaviest.append(np.where(take_upper, upper, heaviest))
+            self.heaviest_child.append(np.where(take_upper, heaviest_child[up], heaviest_child))
+
+    # Move the cities selected by mask up 2^k levels, tracking the heaviest edge
+    def _climb(self, k, nodes, mask, best, best_child):
+        candidate = self.heaviest[k][nodes]
+        better = mask & (candidate > best)
+        best[better] = candidate[better]
+        best_child[better] = self.heaviest_child[k][nodes][better]
+        nodes[mask] = self.up[k][nodes[mask]]
+
+    # Route statistics for the city pairs (a[i], b[i]), as arrays:
+    # lca, hops, cost, and the bottleneck (heaviest) edge as its weight and its
+    # two cities (NaN / -1 when a[i] == b[i])
+    def batch(self, a, b):
+        a = np.atleast_1d(np.asarray(a, dtype=np.int64))
+        b = np.atleast_1d(np.asarray(b, dtype=np.int64))
+        deeper = self.depth[a] >= self.depth[b]
+        x = np.where(deeper, a, b)
+        y = np.where(deeper, b, a)
+        best = np.full(len(x), -np.inf)
+        best_child = np.full(len(x), -1, dtype=np.int64)
+
+        diff = self.depth[x] - self.depth[y]
+        for k in range(len(self.up)):
+            self._climb(k, x, ((diff >> k) & 1).astype(bool), best, best_child)
+        for k in reversed(range(len(self.up))):
+            mask = self.up[k][x] != self.up[k][y]
+            self._climb(k, x, mask, best, best_child)
+            self._climb(k, y, mask, best, best_child)
+        mask = x != y
+        self._climb(0, x, mask, best, best_child)
+        self._climb(0, y, mask, best, best_child)
+        lca = x
+
+        found = best_child >= 0
+        return {
+            "lca": lca,
+            "hops": self.depth[a] + self.depth[b] - 2 * self.depth[lca],
+            "cost": self.cost[a] + self.cost[b] - 2 * self.cost[lca],
+            "bottleneck": np.where(found, best, np.nan),
+            "bottleneck_u": best_child,
+            "bottleneck_v": np.where(found, self.parent[np.maximum(best_child, 0)], -1),
+        }
+
+    # Cities on the route from a to b, both included
+    def path(self, a, b):
+        lca = int(self.batch(a, b)["lca"][0])
+        up_a, up_b = [a], [b]
+        while up_a[-1] != lca:
+            up_a.append(int(self.parent[up_a[-1]]))
+        while up_b[-1] != lca:
+            up_b.append(int(self.parent[up_b[-1]]))
+        return up_a + up_b[-2::-1]
+
+    # Route, hop count, total cost and bottleneck edge between two cities
+    def query(self, a, b):
+        stats = self.batch(a, b)
+        return {
+            "path": self.path(a, b),
+            "hops": int(stats["hops"][0]),
+            "cost": float(stats["cost"][0]),
+            "bottleneck": float(stats["bottleneck"][0]),
+            "bottleneck_edge": (int(stats["bottleneck_u"][0]), int(stats["bottleneck_v"][0])),
+        }
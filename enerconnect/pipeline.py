@@ -0,0 +1,147 @@
+# Headless load -> clean -> weight -> MST pipeline, usable from scripts and
+# batch jobs without starting Streamlit
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+
+import pandas as pd
+
+from .dataset import load_dataset
+from .export import EXPORT_FORMATS, write_export
+from .layers import DEFAULT_SNAP_KM, city_bounds, join_layers, line_links, read_layer
+from .mst import DEFAULT_LINE_COST, SPARSE_THRESHOLD, mst_gap, prim_mst
+from .weights import CONSUMPTION_WEIGHT, DISTANCE_WEIGHT
+
+OUTPUT_FORMATS = ("json", *EXPORT_FORMATS)
+
+
+# MST edges as a table of city names and weights
+def edges_frame(df, edges):
+    cities = df['City'].tolist()
+    return pd.DataFrame({
+        "Origin City": [cities[u] for u, _, _ in edges],
+        "Destination City": [cities[v] for _, v, _ in edges],
+        "Weight (Cost)": [weight for _, _, weight in edges],
+    })
+
+
+# Run the pipeline for one dataset and one weight split. The starting city
+# (name) defaults to the first city in the file. lines is an optional
+# GeoJSON/GeoParquet file of existing lines; the city pairs they link (see
+# layers.line_links) cost at most line_cost in the MST. With gap, a sparse
+# result is compared with the exact dense MST (mst_gap, O(n^2) time) and its
+# relative gap is added to the summary.
+def run_pipeline(path, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT, start_city=None, mode="auto",
+                 lines=None, line_cost=DEFAULT_LINE_COST, snap_km=DEFAULT_SNAP_KM, gap=False):
+    started = time.perf_counter()
+    df = load_dataset(path)
+    start_city_idx = 0
+    if start_city is not None:
+        matches = (df['City'] == start_city).to_numpy().nonzero()[0]
+        if not len(matches):
+            raise ValueError(f"City {start_city!r} not found in {path}.")
+        start_city_idx = int(matches[0])
+
+    links = None
+    if lines is not None:
+        links = line_links(df, read_layer(lines, bbox=city_bounds(df)), snap_km)
+    edges, mst_cost, _ = prim_mst(df, start_city_idx, mode=mode,
+                                  distance_weight=distance_weight, consumption_weight=consumption_weight,
+                                  lines=links, line_cost=line_cost)
+    seconds = time.perf_counter() - started
+
+    relative_gap = None
+    if gap and (mode == "sparse" or (mode == "auto" and len(df) > SPARSE_THRESHOLD)):
+        relative_gap = mst_gap(df, mst_cost, distance_weight, consumption_weight, links, line_cost)["relative_gap"]
+    return {
+        "source": str(path),
+        "distance_weight": distance_weight,
+        "consumption_weight": consumption_weight,
+        "start_city": df['City'].iloc[start_city_idx] if len(df) else None,
+        "cities": len(df),
+        "line_links": None if links is None else len(links[0]),
+        "mst_cost": mst_cost,
+        "relative_gap": relative_gap,
+        "seconds": seconds,
+        "edges": edges_frame(df, edges),
+    }
+
+
+# File name stem for one (dataset, weights) result
+def result_name(path, distance_weight, consumption_weight):
+    return f"{Path(path).stem}_d{distance_weight:g}_c{consumption_weight:g}"
+
+
+# Write the edges of one result and return its summary (everything but edges)
+def write_result(result, output_dir, fmt="json"):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = result_name(result["source"], result["distance_weight"], result["consumption_weight"])
+    summary = {key: value for key, value in result.items() if key != "edges"}
+
+    if fmt == "json":
+        target = output_dir / f"{name}.json"
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump({**summary, "edges": result["edges"].to_dict(orient="records")}, f, indent=2)
+    elif fmt in EXPORT_FORMATS:
+        target = output_dir / f"{name}{EXPORT_FORMATS[fmt][0]}"
+        write_export(result["edges"], target, fmt)
+    else:
+        raise ValueError(f"Unknown output format: {fmt!r}")
+
+    summary["output"] = str(target)
+    return summary
+
+
+# Worker entry point; runs in a child process, so it only returns the summary
+def _run_task(task):
+    path, (distance_weight, consumption_weight), output_dir, fmt, start_city, mode, lines, line_cost, snap_km, gap = task
+    result = run_pipeline(path, distance_weight, consumption_weight, start_city, mode, lines, line_cost, snap_km, gap)
+    return write_result(result, output_dir, fmt)
+
+
+# Run every (dataset, weight split) combination across a process pool and
+# write one result file per run plus a summary.json in output_dir.
+# weight_settings is a list of (distance_weight, consumption_weight) pairs.
+def run_batch(paths, weight_settings, output_dir, fmt="json", workers=None, start_city=None, mode="auto",
+              lines=None, line_cost=DEFAULT_LINE_COST, snap_km=DEFAULT_SNAP_KM, gap=False):
+    tasks = [
+        (str(path), tuple(weights), str(output_dir), fmt, start_city, mode,
+         None if lines is None else str(lines), line_cost, snap_km, gap)
+        for path, weights in product(paths, weight_settings)
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        summaries = [_run_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            summaries = list(pool.map(_run_task, tasks))
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(output_dir) / "summary.json", "w", encoding="utf-8") as f:
+        json.dump(summaries, f, indent=2)
+    return summaries
+
+
+# Join the cities of each dataset to their state (polygon layer) and nearest
+# substation (point layer) and write one table per dataset to output_dir.
+# Returns the written paths.
+def run_join(paths, output_dir, states=None, state_column='name', substations=None, substation_column=None,
+             fmt="csv"):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt!r}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    state_layer = None if states is None else read_layer(states)
+    substation_layer = None if substations is None else read_layer(substations)
+
+    written = []
+    for path in paths:
+        joined = join_layers(load_dataset(path), state_layer, state_column, substation_layer, substation_column)
+        target = output_dir / f"{Path(path).stem}_layers{EXPORT_FORMATS[fmt][0]}"
+        write_export(joined, target, fmt)
+        written.append(str(target))
+    return written
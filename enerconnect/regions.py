@@ -0,0 +1,95 @@
+# Supply regions from the MST. Removing the k - 1 heaviest edges of a minimum
+# spanning tree leaves exactly the k clusters of single-linkage clustering, so
+# nothing beyond the tree is needed. The tree edges are sorted once and merged
+# lightest first into the full dendrogram; the regions for any k are then the
+# connected components of the n - k lightest edges, found in O(n).
+import numpy as np
+import pandas as pd
+
+from .dataset import CATEGORY_COLUMNS, TOTAL_COLUMN
+
+
+class RegionTree:
+    # edges: MST edges (u, v, weight) over the cities of df
+    def __init__(self, edges, df):
+        self.n = len(df)
+        if len(edges) != self.n - 1:
+            raise ValueError("The edges do not form a spanning tree.")
+        u = np.array([edge[0] for edge in edges], dtype=np.int64)
+        v = np.array([edge[1] for edge in edges], dtype=np.int64)
+        w = np.array([edge[2] for edge in edges], dtype=np.float64)
+        order = np.argsort(w, kind="stable")
+        self.u, self.v, self.weight = u[order], v[order], w[order]
+
+        self.cities = df['City'].to_numpy(dtype=object)
+        self.consumption = df[CATEGORY_COLUMNS].to_numpy(dtype=np.float64)
+        self.linkage = self._linkage()
+
+    # Single-linkage dendrogram in the scipy.cluster.hierarchy layout: row i
+    # merges clusters linkage[i, 0] and linkage[i, 1] (cities are 0..n-1, the
+    # cluster made by row i is n + i) at height linkage[i, 2] into a cluster
+    # of linkage[i, 3] cities
+    def _linkage(self):
+        n = self.n
+        parent = list(range(n))
+        cluster = list(range(n))  # Dendrogram cluster of each union-find root
+        size = [1] * n
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        linkage = np.empty((max(n - 1, 0), 4))
+        for i, (a, b, weight) in enumerate(zip(self.u.tolist(), self.v.tolist(), self.weight.tolist())):
+            root_a, root_b = find(a), find(b)
+            linkage[i] = (min(cluster[root_a], cluster[root_b]), max(cluster[root_a], cluster[root_b]),
+                          weight, size[root_a] + size[root_b])
+            parent[root_a] = root_b
+            size[root_b] += size[root_a]
+            cluster[root_b] = n + i
+        return linkage
+
+    def _check(self, k):
+        if not 1 <= k <= self.n:
+            raise ValueError(f"The number of regions must be between 1 and {self.n}.")
+
+    # Region (0..k-1) of every city after cutting the k - 1 heaviest edges,
+    # numbered in the order of their first city
+    def labels(self, k):
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        self._check(k)
+        keep = self.n - k
+        graph = coo_matrix((np.ones(keep), (self.u[:keep], self.v[:keep])), shape=(self.n, self.n))
+        _, labels = connected_components(graph, directed=False)
+        return labels
+
+    # The k - 1 edges cut to get k regions, as (u, v, weight) arrays
+    def cut_edges(self, k):
+        self._check(k)
+        keep = self.n - k
+        return self.u[keep:], self.v[keep:], self.weight[keep:]
+
+    # One row per region: number of cities, its highest-consumption city,
+    # consumption per category and in total, and the cost of its part of
+    # the MST (rounded to 2 decimals)
+    def regions(self, k):
+        labels = self.labels(k)
+        keep = self.n - k
+        sums = np.column_stack([np.bincount(labels, weights=column, minlength=k) for column in self.consumption.T])
+        total = self.consumption.sum(axis=1)
+        by_region = np.lexsort((-total, labels))
+        main = by_region[np.searchsorted(labels[by_region], np.arange(k))]
+
+        table = pd.DataFrame(sums, columns=CATEGORY_COLUMNS)
+        table.insert(0, 'Region', np.arange(1, k + 1))
+        table.insert(1, 'Cities', np.bincount(labels, minlength=k))
+        table.insert(2, 'Main City', self.cities[main])
+        table[TOTAL_COLUMN] = sums.sum(axis=1)
+        table['MST Cost'] = np.bincount(labels[self.u[:keep]], weights=self.weight[:keep], minlength=k)
+        numeric = table.columns.drop(['Region', 'Cities', 'Main City'])
+        table[numeric] = table[numeric].round(2)
+        return table
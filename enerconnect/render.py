@@ -0,0 +1,255 @@
+# Compact layer data for the pydeck maps. Only the fields a layer and its
+# tooltip use are sent to the browser, under short names and with rounded
+# numbers. Above CLUSTER_THRESHOLD points the cities are merged into grid
+# cells sized for the map zoom level, with their consumption summed, so the
+# payload stays small however many cities there are.
+import numpy as np
+import pandas as pd
+
+from .dataset import CATEGORIES, MWH_COLUMN, TIER_COLORS, consumption_tier
+from .store import edges_to_array
+
+# Above this many points the map shows grid clusters instead of single cities
+CLUSTER_THRESHOLD = 5000
+
+# Width of a cluster cell on screen, in pixels at the chosen zoom level
+CLUSTER_CELL_PIXELS = 40
+
+DEFAULT_ZOOM = 5
+
+# Marker radius of a single city, in meters, on the Home and Distribution maps
+POINT_RADIUS = 50000
+NETWORK_POINT_RADIUS = 10000
+
+# 5 decimals of a degree is about 1 m, far below what the map can show
+COORDINATE_DECIMALS = 5
+VALUE_DECIMALS = 2
+
+# Short field name sent to the browser for each consumption category
+CATEGORY_FIELDS = {
+    'Domestic': 'domestic',
+    'Commercial': 'commercial',
+    'Industry': 'industry',
+    'Public Water Work & Street Light': 'public',
+    'Others': 'others',
+}
+VALUE_FIELDS = list(CATEGORY_FIELDS.values()) + ['mwh']
+
+# Distribution network colors: starting city, other cities, tree edges
+START_COLOR = [255, 255, 255]
+CITY_COLOR = [0, 0, 255]
+EDGE_COLOR = [255, 165, 0]
+
+# Tooltip of the Distribution map; city and edge records share its fields
+NETWORK_TOOLTIP = {
+    "text": "{name}\n{detail}",
+    "style": {"backgroundColor": "steelblue", "color": "white"},
+}
+
+# Supply region colors (see enerconnect.regions), one per region
+REGION_COLORS = np.array([
+    [31, 119, 180], [255, 127, 14], [44, 160, 44], [214, 39, 40], [148, 103, 189],
+    [140, 86, 75], [227, 119, 194], [127, 127, 127], [188, 189, 34], [23, 190, 207],
+    [174, 199, 232], [255, 187, 120], [152, 223, 138], [255, 152, 150], [197, 176, 213],
+    [196, 156, 148], [247, 182, 210], [199, 199, 199], [219, 219, 141], [158, 218, 229],
+])
+
+
+# Size in degrees of a cluster cell at a web-mercator zoom level
+# (a 256 px tile spans 360 / 2^zoom degrees of longitude)
+def cell_degrees(zoom):
+    return CLUSTER_CELL_PIXELS * 360 / (256 * 2 ** zoom)
+
+
+# The fields the map layer needs, one row per city
+def point_fields(df):
+    fields = pd.DataFrame({
+        'city': df['City'].astype(object).to_numpy(),
+        'lon': df['Longitude'].to_numpy(dtype=np.float64),
+        'lat': df['Latitude'].to_numpy(dtype=np.float64),
+    })
+    for label, field in CATEGORY_FIELDS.items():
+        fields[field] = df[CATEGORIES[label]].to_numpy(dtype=np.float64)
+    fields['mwh'] = df[MWH_COLUMN].to_numpy(dtype=np.float64)
+    return fields
+
+
+# Merge the cities of each grid cell into one point at their mean position
+# with the summed consumption; the label is the city name for single-city
+# cells and "<count> cities" otherwise
+def grid_clusters(fields, zoom=DEFAULT_ZOOM):
+    cell = cell_degrees(zoom)
+    keys = [np.floor(fields['lat'] / cell), np.floor(fields['lon'] / cell)]
+    grouped = fields.groupby(keys, sort=False)
+    clusters = grouped[['lon', 'lat']].mean()
+    clusters[VALUE_FIELDS] = grouped[VALUE_FIELDS].sum()
+    count = grouped.size().to_numpy()
+    clusters.insert(0, 'city', np.where(count == 1, grouped['city'].first().to_numpy(),
+                                        [f"{c} cities" for c in count]))
+    clusters['count'] = count
+    return clusters.reset_index(drop=True)
+
+
+# Layer records (list of dicts) with position, tooltip values, color and
+# radius; cities are clustered when there are more than `threshold`.
+# Returns (records, clustered).
+def layer_records(df, zoom=DEFAULT_ZOOM, threshold=CLUSTER_THRESHOLD):
+    fields = point_fields(df)
+    clustered = len(fields) > threshold
+    if clustered:
+        fields = grid_clusters(fields, zoom)
+        cell_meters = cell_degrees(zoom) * 111_320
+        fields['radius'] = np.minimum(POINT_RADIUS * np.sqrt(fields.pop('count')), cell_meters / 2).round()
+    else:
+        fields['radius'] = POINT_RADIUS
+    fields[['lon', 'lat']] = fields[['lon', 'lat']].round(COORDINATE_DECIMALS)
+    fields[VALUE_FIELDS] = fields[VALUE_FIELDS].round(VALUE_DECIMALS)
+    fields['color'] = TIER_COLORS[consumption_tier(fields['mwh'])].tolist()
+    return fields.to_dict(orient='records'), clustered
+
+
+# Payloads of the Distribution page, gathered in bulk by position from the
+# city and edge index arrays (no per-row lookups), so building them stays
+# linear in the number of cities and edges.
+
+# One row per city: name, position, consumption (MWh) and color (white for
+# the start city)
+def network_cities(df, start_city_idx):
+    is_start = np.arange(len(df)) == start_city_idx
+    return pd.DataFrame({
+        'city': df['City'].astype(object).to_numpy(),
+        'lon': df['Longitude'].to_numpy(dtype=np.float64),
+        'lat': df['Latitude'].to_numpy(dtype=np.float64),
+        'mwh': df[MWH_COLUMN].to_numpy(dtype=np.float64),
+        'color': np.where(is_start[:, None], START_COLOR, CITY_COLOR).tolist(),
+    })
+
+
+# One row per MST edge (u, v, weight): city positions u/v, names, endpoint
+# coordinates, cost (float) and weight (2-decimal text)
+def network_edges(df, edges):
+    array = edges_to_array(edges)
+    u, v, weight = array['u'], array['v'], array['weight']
+    names = df['City'].astype(object).to_numpy()
+    lon = df['Longitude'].to_numpy(dtype=np.float64)
+    lat = df['Latitude'].to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        'u': u,
+        'v': v,
+        'origin': names[u],
+        'destination': names[v],
+        'source_lon': lon[u],
+        'source_lat': lat[u],
+        'target_lon': lon[v],
+        'target_lat': lat[v],
+        'cost': weight,
+        'weight': np.char.mod("%.2f", weight).astype(object),
+    })
+
+
+# network_cities / network_edges payloads colored by supply region, given the
+# region of every city (RegionTree.labels): cities and the edges inside a
+# region take the region's color, the edges cut between regions are dropped
+def region_layers(cities, edges, labels):
+    colors = REGION_COLORS[labels % len(REGION_COLORS)]
+    u, v = edges['u'].to_numpy(), edges['v'].to_numpy()
+    inside = labels[u] == labels[v]
+    cities = cities.assign(color=colors.tolist(), region=labels + 1)
+    return cities, edges[inside].assign(color=colors[u[inside]].tolist())
+
+
+# Compact Distribution map records (lists of dicts) from network_cities /
+# network_edges frames (region colored or not): name, rounded position,
+# color, radius and tooltip detail of every city, and endpoints, color, name
+# and detail of every edge. Above `threshold` cities they are merged into
+# grid cells like layer_records (consumption summed, colored like their
+# first city) and the edges into one link per pair of cells, with the edges
+# inside a cell dropped. Returns (city records, edge records, clustered).
+def network_records(cities, edges, zoom=DEFAULT_ZOOM, threshold=CLUSTER_THRESHOLD):
+    clustered = len(cities) > threshold
+    fields = pd.DataFrame({
+        'name': cities['city'].to_numpy(dtype=object),
+        'lon': cities['lon'].to_numpy(dtype=np.float64),
+        'lat': cities['lat'].to_numpy(dtype=np.float64),
+        'mwh': cities['mwh'].to_numpy(dtype=np.float64),
+        'color': cities['color'].to_numpy(dtype=object),
+    })
+    edge_color = edges['color'].to_numpy(dtype=object) if 'color' in edges else [EDGE_COLOR] * len(edges)
+    links = pd.DataFrame({
+        'name': edges['origin'].to_numpy(dtype=object) + " ↔ " + edges['destination'].to_numpy(dtype=object),
+        'source_lon': edges['source_lon'].to_numpy(dtype=np.float64),
+        'source_lat': edges['source_lat'].to_numpy(dtype=np.float64),
+        'target_lon': edges['target_lon'].to_numpy(dtype=np.float64),
+        'target_lat': edges['target_lat'].to_numpy(dtype=np.float64),
+        'cost': edges['cost'].to_numpy(dtype=np.float64),
+        'color': edge_color,
+    })
+
+    if clustered:
+        cell = cell_degrees(zoom)
+        keys = pd.MultiIndex.from_arrays([np.floor(fields['lat'] / cell), np.floor(fields['lon'] / cell)])
+        cluster, _ = pd.factorize(keys)
+        grouped = fields.groupby(cluster, sort=True)
+        count = grouped.size().to_numpy()
+        merged = grouped[['lon', 'lat']].mean()
+        merged['mwh'] = grouped['mwh'].sum()
+        merged['color'] = grouped['color'].first()
+        merged.insert(0, 'name', np.where(count == 1, grouped['name'].first().to_numpy(),
+                                          [f"{c} cities" for c in count]))
+        merged['radius'] = np.minimum(NETWORK_POINT_RADIUS * np.sqrt(count), cell * 111_320 / 2).round()
+        fields = merged.reset_index(drop=True)
+
+        # The frames keep the dataset positions as their index (also when
+        # filtered), so the edges' u/v give the rows, and cells, of their cities
+        rows = cities.index.to_numpy()
+        a = cluster[np.searchsorted(rows, edges['u'].to_numpy())]
+        b = cluster[np.searchsorted(rows, edges['v'].to_numpy())]
+        between = a != b
+        low, high = np.minimum(a, b)[between], np.maximum(a, b)[between]
+        grouped = links[between].groupby([low, high])
+        merged = grouped.agg(name=('name', 'first'), cost=('cost', 'sum'), color=('color', 'first'))
+        count = grouped.size().to_numpy()
+        source = merged.index.get_level_values(0).to_numpy()
+        target = merged.index.get_level_values(1).to_numpy()
+        links = pd.DataFrame({
+            'name': np.where(count == 1, merged['name'].to_numpy(), [f"{c} links" for c in count]),
+            'source_lon': fields['lon'].to_numpy()[source],
+            'source_lat': fields['lat'].to_numpy()[source],
+            'target_lon': fields['lon'].to_numpy()[target],
+            'target_lat': fields['lat'].to_numpy()[target],
+            'cost': merged['cost'].to_numpy(),
+            'color': merged['color'].to_numpy(),
+        })
+    else:
+        fields['radius'] = NETWORK_POINT_RADIUS
+
+    fields[['lon', 'lat']] = fields[['lon', 'lat']].round(COORDINATE_DECIMALS)
+    fields['detail'] = np.char.mod("%.2f MWh", fields.pop('mwh').to_numpy()).astype(object)
+    if 'region' in cities and not clustered:
+        fields['detail'] += " · Region " + cities['region'].astype(str).to_numpy(dtype=object)
+    position_columns = ['source_lon', 'source_lat', 'target_lon', 'target_lat']
+    links[position_columns] = links[position_columns].round(COORDINATE_DECIMALS)
+    links['detail'] = "Weight: " + np.char.mod("%.2f", links.pop('cost').to_numpy()).astype(object)
+    return fields.to_dict(orient='records'), links.to_dict(orient='records'), clustered
+
+
+# Edge Weights table from network_edges (numeric weights, so they sort)
+def edge_table(edges):
+    return pd.DataFrame({
+        "Origin City": edges['origin'].to_numpy(),
+        "Destination City": edges['destination'].to_numpy(),
+        "Weight (Cost)": edges['cost'].round(2).to_numpy(),
+    })
+
+
+# MST route list: the edges grouped by origin city, origins numbered (Step)
+# in the order they are first reached, edges of one origin in Prim order
+def route_table(edges):
+    steps, _ = pd.factorize(edges['origin'])
+    order = np.argsort(steps, kind="stable")
+    return pd.DataFrame({
+        "Step": steps[order] + 1,
+        "Origin City": edges['origin'].to_numpy()[order],
+        "Destination City": edges['destination'].to_numpy()[order],
+        "Weight (Cost)": edges['cost'].round(2).to_numpy()[order],
+    })
@@ -0,0 +1,161 @@
+# Sensitivity of the MST to the distance/consumption weight split.
+# With alpha the distance weight and 1 - alpha the consumption weight, every
+# edge weight is alpha * d + (1 - alpha) * c. The distance and mean
+# consumption matrices are computed once and the trees are built on a grid of
+# alphas (the slider's steps). The MST only changes at a finite set of
+# breakpoints in alpha; between two grid points whose trees differ they are
+# located by bisection, but only on demand: when an alpha off the grid is
+# looked up, or for the cost chart within a budget of extra tree runs. Between
+# two breakpoints the tree is fixed and its cost is linear in alpha, so
+# looking up an alpha whose segment is known costs O(n).
+import threading
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from .graph import CondensedGraph
+from .mst import prim_dense
+from .weights import distance_matrix, mean_consumption_matrix, network_arrays, to_condensed
+
+# Grid the sweep starts from (distance weight 0%, 5%, ..., 100%)
+DEFAULT_ALPHAS = np.round(np.linspace(0, 1, 21), 2)
+
+# Breakpoints are located to within this distance in alpha
+DEFAULT_TOLERANCE = 1e-3
+
+# Work (city pairs, n^2 per tree run) the cost chart may spend locating
+# breakpoints: every breakpoint of a small city set, about 20 runs at 1000
+REFINE_BUDGET = 20_000_000
+
+# Largest city set the sweep is offered for: it holds two dense condensed
+# matrices and runs one O(n^2) Prim per grid point
+SWEEP_MAX_CITIES = 1000
+
+
+class WeightSweep:
+    # progress, if given, is called as progress(fraction, message, partial)
+    # while the grid trees are built, with the edges of the tree being grown
+    # as the partial result (see store.cached_mst)
+    def __init__(self, df, alphas=DEFAULT_ALPHAS, tolerance=DEFAULT_TOLERANCE, progress=None):
+        if progress is not None:
+            progress(0.0, "Computing distances")
+        lat, lon, consumption = network_arrays(df)
+        self.n = len(lat)
+        self.distance = to_condensed(distance_matrix(lat, lon))
+        self.consumption = to_condensed(mean_consumption_matrix(consumption))
+        self.tolerance = tolerance
+        self.tree_runs = 0
+        # Every alpha a tree was built for, ascending, and its tree. The trees
+        # of neighbouring knots that differ and are further apart than the
+        # tolerance bracket a breakpoint not located yet.
+        self.knots = sorted(float(alpha) for alpha in alphas)
+        self.trees = []
+        edge_count = max(self.n - 1, 1)
+        for i, alpha in enumerate(self.knots):
+            report = None
+            if progress is not None:
+                message = f"Growing the tree for {alpha:.0%} distance weight"
+                report = lambda edges: progress((i + len(edges) / edge_count) / len(self.knots), message, edges)
+            self.trees.append(self._tree(alpha, report))
+        self.grid_runs = self.tree_runs
+        self._lock = threading.Lock()
+
+    # MST for one alpha, as sorted (u, v) index arrays with u < v
+    def _tree(self, alpha, progress=None):
+        self.tree_runs += 1
+        graph = CondensedGraph(self.n, alpha * self.distance + (1 - alpha) * self.consumption)
+        edges = prim_dense(self.n, graph.row, progress=progress)
+        u = np.array([min(a, b) for a, b, _ in edges], dtype=np.int64)
+        v = np.array([max(a, b) for a, b, _ in edges], dtype=np.int64)
+        order = np.lexsort((v, u))
+        return u[order], v[order]
+
+    @staticmethod
+    def _same(tree1, tree2):
+        return np.array_equal(tree1[0], tree2[0]) and np.array_equal(tree1[1], tree2[1])
+
+    # Whether the breakpoint between knots i and i + 1 still has to be located
+    def _open(self, i):
+        return (self.knots[i + 1] - self.knots[i] > self.tolerance
+                and not self._same(self.trees[i], self.trees[i + 1]))
+
+    # Build the tree halfway between knots i and i + 1. The knot is only
+    # inserted once its tree is built, so a failed run leaves knots and trees
+    # in step.
+    def _split(self, i):
+        mid = (self.knots[i] + self.knots[i + 1]) / 2
+        tree = self._tree(mid)
+        self.knots.insert(i + 1, mid)
+        self.trees.insert(i + 1, tree)
+
+    # Tree valid at alpha, bisecting its bracket first if needed
+    def _tree_at(self, alpha):
+        with self._lock:
+            i = bisect_left(self.knots, alpha)
+            if i < len(self.knots) and self.knots[i] == alpha:
+                return self.trees[i]
+            if i == 0 or i == len(self.knots):
+                return self.trees[min(i, len(self.knots) - 1)]
+            i -= 1
+            while self._open(i):
+                self._split(i)
+                if alpha >= self.knots[i + 1]:
+                    i += 1
+            # Within the tolerance, the switch is put at the upper knot
+            return self.trees[i + 1] if alpha == self.knots[i + 1] else self.trees[i]
+
+    # Locate breakpoints, widest bracket first, until none is left open or
+    # max_runs trees beyond the grid have been built (by default as many as
+    # REFINE_BUDGET allows). Returns whether all breakpoints are located.
+    def refine(self, max_runs=None):
+        if max_runs is None:
+            max_runs = max(REFINE_BUDGET // max(self.n, 1) ** 2, 1)
+        with self._lock:
+            while self.tree_runs - self.grid_runs < max_runs:
+                open_gaps = [i for i in range(len(self.knots) - 1) if self._open(i)]
+                if not open_gaps:
+                    return True
+                self._split(max(open_gaps, key=lambda i: self.knots[i + 1] - self.knots[i]))
+            return not any(self._open(i) for i in range(len(self.knots) - 1))
+
+    # Alphas at which the MST edge set changes (the upper knot of each
+    # bracket, to within the tolerance where located) and the number of
+    # brackets whose breakpoints are not located yet. The sweep is shared by
+    # all sessions, so the knots are read under the lock.
+    @property
+    def breakpoints(self):
+        with self._lock:
+            return [self.knots[i + 1] for i in range(len(self.knots) - 1)
+                    if not self._same(self.trees[i], self.trees[i + 1])]
+
+    @property
+    def unresolved(self):
+        with self._lock:
+            return sum(self._open(i) for i in range(len(self.knots) - 1))
+
+    # Weight of every edge of tree at alpha
+    def _weights(self, alpha, tree):
+        u, v = tree
+        index = self.n * u - u * (u + 1) // 2 + (v - u - 1)
+        return alpha * self.distance[index] + (1 - alpha) * self.consumption[index]
+
+    # MST edges (u, v, weight) and total cost for any alpha in [0, 1]
+    def lookup(self, alpha):
+        u, v = tree = self._tree_at(float(alpha))
+        weights = self._weights(alpha, tree)
+        edges = list(zip(u.tolist(), v.tolist(), weights.tolist()))
+        return edges, float(weights.sum())
+
+    # Total MST cost against alpha at every knot, after locating breakpoints
+    # with up to max_runs extra tree runs in total (see refine). The knots
+    # and their trees are copied under the lock and the costs computed on
+    # the copy.
+    def cost_curve(self, max_runs=None):
+        self.refine(max_runs)
+        with self._lock:
+            points, trees = list(self.knots), list(self.trees)
+        return pd.DataFrame({
+            "Distance weight": points,
+            "Total MST cost": [float(self._weights(alpha, tree).sum()) for alpha, tree in zip(points, trees)],
+        })
@@ -0,0 +1,69 @@
+# Spatial index over city coordinates for nearest-city and radius queries.
+# Cities are placed on the unit sphere and indexed with a k-d tree: straight
+# line (chord) distance between unit vectors orders points exactly like the
+# great-circle distance, and converts to it as 2 * R * asin(chord / 2), which
+# is the haversine distance of calculate_distance.
+import numpy as np
+
+from .weights import EARTH_RADIUS_KM
+
+
+# Points on the unit sphere; Euclidean (chord) order equals great-circle order
+def unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def km_to_chord(distance_km):
+    return 2 * np.sin(np.minimum(distance_km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+class SpatialIndex:
+    def __init__(self, lat, lon):
+        from scipy.spatial import cKDTree
+
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.points = unit_vectors(self.lat, self.lon)
+        self.tree = cKDTree(self.points)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df['Latitude'].to_numpy(dtype=np.float64), df['Longitude'].to_numpy(dtype=np.float64))
+
+    def __len__(self):
+        return len(self.points)
+
+    # k nearest cities to each query point: (distances in km, city indices),
+    # nearest first, shaped (k,) for a single point and (m, k) for arrays
+    def nearest(self, lat, lon, k=1):
+        k = min(k, len(self))
+        query = unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon))
+        chord, indices = self.tree.query(query, k=k)
+        chord, indices = chord.reshape(len(query), k), indices.reshape(len(query), k)
+        if np.ndim(lat) == 0:
+            chord, indices = chord[0], indices[0]
+        return chord_to_km(chord), indices
+
+    # Cities within radius_km of one point: (city indices, distances in km),
+    # nearest first
+    def within(self, lat, lon, radius_km):
+        query = unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon))[0]
+        indices = np.array(self.tree.query_ball_point(query, km_to_chord(radius_km)), dtype=np.int64)
+        distances = chord_to_km(np.linalg.norm(self.points[indices] - query, axis=1))
+        order = np.argsort(distances, kind="stable")
+        return indices[order], distances[order]
+
+    # Candidate edges linking every city to its k nearest other cities, as
+    # (rows, cols) index arrays
+    def neighbour_pairs(self, k):
+        k = min(k + 1, len(self))  # The first neighbour of each point is the point itself
+        _, neighbours = self.tree.query(self.points, k=k)
+        rows = np.repeat(np.arange(len(self)), k)
+        cols = neighbours.reshape(-1)
+        keep = rows != cols
+        return rows[keep], cols[keep]
@@ -0,0 +1,34 @@
+# Warm-up of a fresh server. Builds what the pages need on their first visit
+# (the per-year frame every page's year selector reads and the MST of the
+# default year choice for the default weight split) in the on-disk artifact
+# store, so a new worker process only reads them. Run it before starting the server:
+#
+#   python -m enerconnect warmup && streamlit run "1_🏠_Home.py"
+import time
+
+from .dataset import DATASET_PATH, file_hash
+from .store import ArtifactStore, cached_city_years, cached_mst
+from .timeseries import LATEST, TimeSeriesStore
+from .weights import CONSUMPTION_WEIGHT, DISTANCE_WEIGHT
+
+
+# Returns the seconds spent on each step (near zero for the steps whose
+# artifacts were already in the store)
+def warm_up(path=DATASET_PATH, weights=((DISTANCE_WEIGHT, CONSUMPTION_WEIGHT),), store=None):
+    store = store or ArtifactStore()
+    timings = {}
+    started = time.perf_counter()
+
+    def step(name):
+        nonlocal started
+        now = time.perf_counter()
+        timings[name] = now - started
+        started = now
+
+    source_hash = file_hash(path)
+    latest = TimeSeriesStore(cached_city_years(path, store, source_hash)).latest
+    step("city_years")
+    for distance_weight, consumption_weight in weights:
+        cached_mst(latest, f"{source_hash}:{LATEST}", distance_weight, consumption_weight, store)
+        step(f"mst {distance_weight},{consumption_weight}")
+    return timings
@@ -0,0 +1,166 @@
+# Persistent artifact store shared by server restarts and worker processes.
+# Cleaned frames are kept as Parquet, arrays (weight matrices, MST edges) as
+# .npy files that are memory-mapped on load. Every artifact is keyed by the
+# source file hash plus the parameters it was derived from.
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .dataset import DATASET_PATH, file_hash, load_city_years, load_dataset
+from .graph import CondensedGraph
+from .mst import SPARSE_THRESHOLD, prim_mst
+from .weights import CONSUMPTION_WEIGHT, DISTANCE_WEIGHT
+
+CACHE_DIR = Path(os.environ.get("ENERCONNECT_CACHE_DIR", Path(__file__).resolve().parent.parent / ".enerconnect_cache"))
+
+# Bump when the cleaning or derivation logic changes, to invalidate old artifacts
+ARTIFACT_VERSION = 1
+
+# Layout of MST edges on disk: (u, v, weight) records
+EDGE_DTYPE = np.dtype([('u', '<i8'), ('v', '<i8'), ('weight', '<f8')])
+
+
+# List of (u, v, weight) tuples <-> structured EDGE_DTYPE array
+def edges_to_array(edges):
+    return np.array([tuple(edge) for edge in edges], dtype=EDGE_DTYPE)
+
+
+def array_to_edges(array):
+    return [(int(u), int(v), float(w)) for u, v, w in array.tolist()]
+
+
+class ArtifactStore:
+    def __init__(self, root=CACHE_DIR):
+        self.root = Path(root)
+
+    # Stable key for an artifact derived from the given parameters
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(repr((ARTIFACT_VERSION,) + parts).encode('utf-8')).hexdigest()[:32]
+
+    def path(self, name, key, suffix):
+        return self.root / name / f"{key}{suffix}"
+
+    # Write through a temporary file and rename, so concurrent readers never
+    # see a partially written artifact
+    def write_atomic(self, target, write):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=target.suffix + '.tmp')
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load_frame(self, name, key):
+        path = self.path(name, key, '.parquet')
+        if not path.exists():
+            return None
+        return pd.read_parquet(path)
+
+    def save_frame(self, name, key, df):
+        self.write_atomic(self.path(name, key, '.parquet'), lambda tmp: df.to_parquet(tmp, index=False))
+        return df
+
+    # Arrays come back memory-mapped read-only unless mmap=False
+    def load_array(self, name, key, mmap=True):
+        path = self.path(name, key, '.npy')
+        if not path.exists():
+            return None
+        return np.load(path, mmap_mode='r' if mmap else None)
+
+    def save_array(self, name, key, array):
+        def write(tmp):
+            with open(tmp, 'wb') as f:
+                np.save(f, array)
+        self.write_atomic(self.path(name, key, '.npy'), write)
+        return array
+
+
+# Cleaned dataset, read from the store when this file version was seen before
+def cached_dataset(path=DATASET_PATH, store=None, source_hash=None):
+    store = store or ArtifactStore()
+    key = store.key(source_hash or file_hash(path))
+    df = store.load_frame('dataset', key)
+    if df is None:
+        df = store.save_frame('dataset', key, load_dataset(path))
+    else:
+        # Parquet keeps the column types but stores the colors as arrays
+        df['color'] = df['color'].map(lambda color: color.tolist())
+    return df
+
+
+# load_city_years, read from the store when this file version was seen before
+def cached_city_years(path=DATASET_PATH, store=None, source_hash=None):
+    store = store or ArtifactStore()
+    key = store.key(source_hash or file_hash(path))
+    df = store.load_frame('city_years', key)
+    if df is None:
+        df = store.save_frame('city_years', key, load_city_years(path))
+    else:
+        df['color'] = df['color'].map(lambda color: color.tolist())
+    return df
+
+
+# Fetch an array artifact, or build and persist it with `build()`
+def cached_array(name, key, build, store=None, mmap=True):
+    store = store or ArtifactStore()
+    array = store.load_array(name, key, mmap=mmap)
+    if array is None:
+        store.save_array(name, key, build())
+        array = store.load_array(name, key, mmap=mmap)
+    return array
+
+
+# Edges of the MST rooted at the first city, persisted per dataset version and
+# weight split. The condensed weight graph used to build it is persisted too and
+# memory-mapped, so other workers can reuse it without recomputing.
+# progress, if given, is called as progress(fraction, message, partial) while
+# the tree is built; partial is the (still growing) list of edges picked so far.
+def cached_mst(df, source_hash, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT, store=None,
+               progress=None):
+    store = store or ArtifactStore()
+    sparse = len(df) > SPARSE_THRESHOLD
+    key = store.key(source_hash, distance_weight, consumption_weight, sparse)
+    report = progress or _no_progress
+    edge_count = max(len(df) - 1, 1)
+
+    def build():
+        # Small networks use the exact algorithm over the full weight matrix,
+        # large ones a sparse candidate graph. The weights take the first half
+        # of the progress (a fifth for the candidate graph), the tree the rest.
+        if sparse:
+            report(0.0, "Building the candidate graph")
+            edges, _, _ = prim_mst(df, mode="sparse", distance_weight=distance_weight, consumption_weight=consumption_weight,
+                                   progress=lambda edges: report(0.2 + 0.8 * len(edges) / edge_count, "Growing the tree", edges))
+        else:
+            graph = cached_graph(df, source_hash, distance_weight, consumption_weight, store,
+                                 progress=lambda fraction: report(fraction / 2, "Computing edge weights"))
+            edges, _, _ = prim_mst(df, weights=graph, distance_weight=distance_weight, consumption_weight=consumption_weight,
+                                   progress=lambda edges: report(0.5 + 0.5 * len(edges) / edge_count, "Growing the tree", edges))
+        return edges_to_array(edges)
+
+    return array_to_edges(cached_array('mst', key, build, store))
+
+
+def _no_progress(fraction, message, partial=None):
+    pass
+
+
+# Condensed float32 weight graph, built straight into a memory-mapped file in
+# the store and shared by every process that opens it
+def cached_graph(df, source_hash, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT, store=None,
+                 progress=None):
+    store = store or ArtifactStore()
+    key = store.key(source_hash, distance_weight, consumption_weight)
+    path = store.path('graph', key, '.npy')
+    if not path.exists():
+        store.write_atomic(path, lambda tmp: CondensedGraph.from_frame(df, distance_weight, consumption_weight, path=tmp,
+                                                                       progress=progress))
+    return CondensedGraph.load(path, len(df))
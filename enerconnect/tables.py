@@ -0,0 +1,31 @@
+# Server-side search, sort and paging for the tables in the pages, so only the
+# visible window of a (possibly large) precomputed frame is sent to the browser
+import numpy as np
+import pandas as pd
+
+DEFAULT_PAGE_SIZE = 25
+
+
+# Row positions of `frame` whose `column` contains `query` (case-insensitive),
+# ordered by `sort_by` (stable, so ties keep the frame's order); all rows in
+# frame order when neither is given
+def table_view(frame, query="", column='City', sort_by=None, descending=False):
+    positions = np.arange(len(frame))
+    if query:
+        matches = frame[column].astype(str).str.contains(query, case=False, regex=False)
+        positions = positions[matches.to_numpy(dtype=bool)]
+    if sort_by is not None:
+        values = pd.Series(frame[sort_by].to_numpy()[positions])
+        order = values.sort_values(ascending=not descending, kind="stable", na_position="last").index
+        positions = positions[order.to_numpy()]
+    return positions
+
+
+def page_count(rows, page_size=DEFAULT_PAGE_SIZE):
+    return max(1, -(-rows // page_size))
+
+
+# Slice bounds [start, end) of a 1-based page
+def page_bounds(rows, page, page_size=DEFAULT_PAGE_SIZE):
+    start = min((page - 1) * page_size, rows)
+    return start, min(start + page_size, rows)
@@ -0,0 +1,86 @@
+# Multi-year consumption store keyed by (City, Year). Rows are kept sorted by
+# year, so each year is one contiguous block with a prebuilt snapshot, and the
+# rollups the pages show (per-year totals, year-over-year growth per category,
+# per-city trends, each city's latest year) are computed once when the store
+# is built.
+import numpy as np
+import pandas as pd
+
+from .dataset import CATEGORIES, CATEGORY_COLUMNS, MWH_COLUMN, TOTAL_COLUMN, derive_columns, normalize_year
+
+KEYS = ['City', 'Year']
+
+# Year part of the version key of TimeSeriesStore.latest (see ui.select_year)
+LATEST = "latest"
+VALUE_COLUMNS = CATEGORY_COLUMNS + [TOTAL_COLUMN, MWH_COLUMN]
+
+
+class TimeSeriesStore:
+    # df: cleaned rows (see clean_dataset / ConsumptionAggregator.city_year_frame)
+    def __init__(self, df):
+        df = df.copy()
+        df['Year'] = normalize_year(df['Year'])
+        df = df[df['Year'].notna()]
+
+        # One row per (City, Year): repeated rows are summed, coordinates averaged
+        if df.duplicated(KEYS).any():
+            aggregations = {col: 'sum' for col in CATEGORY_COLUMNS}
+            aggregations.update(Latitude='mean', Longitude='mean')
+            df = derive_columns(df.groupby(KEYS, sort=False, as_index=False).agg(aggregations))
+
+        # Labels such as "2017-18" sort chronologically as text
+        self.years = sorted(df['Year'].unique())
+        df['Year'] = pd.Categorical(df['Year'], categories=self.years)
+        codes = df['Year'].cat.codes.to_numpy()
+
+        # Most recent reported year of every city, one row per city in the
+        # order the cities first appear
+        latest = np.argsort(codes, kind="stable")
+        latest = latest[~df['City'].iloc[latest[::-1]].duplicated().to_numpy()[::-1]]
+        self.latest = df.iloc[np.sort(latest)].reset_index(drop=True)
+
+        self.frame = df.iloc[np.argsort(codes, kind="stable")].reset_index(drop=True)
+
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(self.years)))))
+        self.snapshots = {
+            year: self.frame.iloc[bounds[i]:bounds[i + 1]].reset_index(drop=True)
+            for i, year in enumerate(self.years)
+        }
+
+        # Per-year totals of every category plus the number of cities reported
+        totals = self.frame.groupby('Year', observed=False)[VALUE_COLUMNS].sum()
+        totals.insert(0, 'Cities', self.frame.groupby('Year', observed=False).size())
+        self.year_totals = totals
+
+        # Year-over-year growth (%) per category, like for like: each pair of
+        # consecutive years only compares the cities reported in both (NaN
+        # when there are none), rounded to 2 decimals for display
+        labels = {column: label for label, column in CATEGORIES.items()}
+        labels[TOTAL_COLUMN] = 'Total'
+        values = self.frame.set_index(KEYS)[CATEGORY_COLUMNS + [TOTAL_COLUMN]].unstack('Year')
+        rows = []
+        for previous, current in zip(self.years, self.years[1:]):
+            before = values.xs(previous, axis=1, level='Year')
+            after = values.xs(current, axis=1, level='Year')
+            common = before.notna().all(axis=1) & after.notna().all(axis=1)
+            base = before[common].sum()
+            change = (after[common].sum() - base) / base.where(base != 0) * 100
+            rows.append({'Cities': int(common.sum()), **change.to_dict()})
+        growth = pd.DataFrame(rows, index=pd.Index(self.years[1:], name='Year'),
+                              columns=['Cities', *CATEGORY_COLUMNS, TOTAL_COLUMN])
+        self.growth = growth.rename(columns=labels).round(2)
+
+        # Consumption (MWh) of every city in every year, with the change
+        # between its first and last reported year (NaN with a single year),
+        # rounded to 2 decimals for display
+        trends = self.frame.set_index(KEYS)[MWH_COLUMN].unstack('Year').reindex(columns=self.years)
+        trends = trends.rename(columns=str).rename_axis(columns=None)
+        first = trends.bfill(axis=1).iloc[:, 0]
+        last = trends.ffill(axis=1).iloc[:, -1]
+        change = (last - first) / first * 100
+        trends['Change (%)'] = change.where(trends.notna().sum(axis=1) > 1)
+        self.city_trends = trends.reset_index().round(2)
+
+    # Rows of one year, in the shape of the cleaned dataset (shared, read-only)
+    def snapshot(self, year):
+        return self.snapshots[year]
@@ -0,0 +1,358 @@
+# Streamlit helpers shared by the pages. Everything cached here lives in the
+# server process, so all sessions share it.
+import os
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .dataset import DATASET_PATH, file_hash, file_signature
+from .export import EXPORT_FORMATS, FORMAT_LABELS
+from .instrument import Instrumentation
+from .jobs import JobCache
+from .render import DEFAULT_ZOOM, layer_records, network_cities, network_edges, network_records, region_layers
+from .spatial import SpatialIndex
+from .tables import DEFAULT_PAGE_SIZE, page_bounds, page_count, table_view
+from .store import cached_city_years, cached_mst
+from .timeseries import LATEST, TimeSeriesStore
+from .weights import CONSUMPTION_WEIGHT, DISTANCE_WEIGHT
+
+# Cache misses seen by the current script thread, per cache name
+_misses = threading.local()
+
+
+# Called from inside a cached function body, which only runs on a miss
+def note_miss(cache):
+    counts = getattr(_misses, "counts", None)
+    if counts is None:
+        counts = _misses.counts = {}
+    counts[cache] = counts.get(cache, 0) + 1
+
+
+# Call a cached function and record whether it was a hit or a miss
+def cached_call(cache, fn, *args, **kwargs):
+    before = getattr(_misses, "counts", {}).get(cache, 0)
+    result = fn(*args, **kwargs)
+    timings = current_timings()
+    if timings is not None:
+        timings.count(cache, hit=getattr(_misses, "counts", {}).get(cache, 0) == before)
+    return result
+
+
+# Content hash of the dataset, recomputed only when its mtime/size change
+@st.cache_data(show_spinner=False)
+def _dataset_version(path, signature):
+    note_miss("dataset version")
+    return file_hash(path)
+
+
+# Version key of the dataset file (content hash)
+def dataset_version(path=DATASET_PATH):
+    return cached_call("dataset version", _dataset_version, str(path), file_signature(path))
+
+
+# Multi-year store of one dataset version, shared by all sessions. Its frames
+# are never handed to a page directly (see select_year).
+@st.cache_resource(show_spinner="Indexing years...")
+def _timeseries(path, version):
+    note_miss("timeseries")
+    return TimeSeriesStore(cached_city_years(path, source_hash=version))
+
+
+def get_timeseries(path=DATASET_PATH):
+    with stage("timeseries"):
+        return cached_call("timeseries", _timeseries, str(path), dataset_version(path))
+
+
+ALL_YEARS = "All years (latest per city)"
+
+
+# Year selector of a page. Returns the selected year (None for all years),
+# its cities in the shape of the cleaned dataset and a version key naming
+# that frame, which the page uses in place of dataset_version() for every
+# cache derived from it. Every choice has one row per city; for all years
+# that is each city's most recent reported year. Each call returns its own
+# copy of the store's frame, so a page modifying it can never affect other
+# pages or sessions.
+def select_year(key, path=DATASET_PATH):
+    store = get_timeseries(path)
+    choice = st.selectbox("Year", [ALL_YEARS, *store.years], key=key)
+    if choice == ALL_YEARS:
+        return None, store.latest.copy(), f"{dataset_version(path)}:{LATEST}"
+    return choice, store.snapshot(choice).copy(), f"{dataset_version(path)}:{choice}"
+
+
+# Spatial index over the cities of one dataset version, shared by all sessions
+@st.cache_resource(show_spinner=False)
+def _spatial_index(_df, version):
+    note_miss("spatial index")
+    return SpatialIndex.from_frame(_df)
+
+
+def spatial_index(df, version):
+    return cached_call("spatial index", _spatial_index, df, version)
+
+
+# Compact map layer records for the cities at positions `rows` (all when
+# None), built once per dataset version, selection and zoom level and shared
+# read-only by all sessions. Returns (records, clustered).
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _map_layer(_df, version, rows, zoom):
+    note_miss("map layer")
+    return layer_records(_df if rows is None else _df.iloc[rows], zoom)
+
+
+def map_layer(df, version, rows=None, zoom=DEFAULT_ZOOM):
+    return cached_call("map layer", _map_layer, df, version, rows, zoom)
+
+
+# Compact Distribution map records of one tree (see render.network_records):
+# the tree of `tree_key` (its source and weight split) rooted at
+# start_city_idx, colored by region when labels are given (`regions` names
+# them) and limited to the cities at positions `rows` (all when None). Built
+# once per combination and zoom level and shared read-only by all sessions.
+# Returns (city records, edge records, clustered).
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _network_map(_df, _edges, _labels, version, tree_key, start_city_idx, regions, rows, zoom):
+    note_miss("network map")
+    cities, edges = network_cities(_df, start_city_idx), network_edges(_df, _edges)
+    if _labels is not None:
+        cities, edges = region_layers(cities, edges, _labels)
+    if rows is not None:
+        shown = np.zeros(len(_df), dtype=bool)
+        shown[rows] = True
+        cities, edges = cities[shown], edges[shown[edges['u']] & shown[edges['v']]]
+    return network_records(cities, edges, zoom)
+
+
+def network_map(df, edges, version, tree_key, start_city_idx, labels=None, regions=None, rows=None,
+                zoom=DEFAULT_ZOOM):
+    return cached_call("network map", _network_map, df, edges, labels, version, tree_key, start_city_idx,
+                       regions, rows, zoom)
+
+
+# City most recently clicked on the pydeck chart with key chart_key (the chart
+# must be drawn with on_select="rerun" and have a layer with id "cities" whose
+# data has a city or name field)
+def clicked_city(chart_key):
+    selection = (st.session_state.get(chart_key) or {}).get("selection", {})
+    objects = selection.get("objects", {}).get("cities")
+    if objects:
+        return objects[0].get("city", objects[0].get("name"))
+    return None
+
+
+# Radius filter for the maps: keeps the cities within a chosen distance of a
+# centre city, picked from the list or by clicking a city on the chart with key
+# chart_key. `version` names df (see select_year). Returns the indices of the
+# kept cities, nearest first, or None when the filter is off.
+def radius_filter(df, version, key, chart_key=None):
+    cities = df['City'].tolist()
+    clicked = clicked_city(chart_key) if chart_key else None
+    if clicked in cities and clicked != st.session_state.get(f"{key}_clicked"):
+        st.session_state[f"{key}_clicked"] = clicked
+        st.session_state[f"{key}_centre"] = clicked
+
+    with st.expander("📍 Cities within a radius"):
+        enabled = st.toggle("Only show cities near a centre city", key=f"{key}_enabled")
+        centre = st.selectbox("Centre city (or click a city on the map)", cities, key=f"{key}_centre")
+        radius = st.slider("Radius (km)", 10, 2000, 300, step=10, key=f"{key}_radius")
+        if not enabled:
+            return None
+
+        with stage("spatial"):
+            index = spatial_index(df, version)
+            centre_idx = cities.index(centre)
+            kept, distances = index.within(index.lat[centre_idx], index.lon[centre_idx], radius)
+        st.caption(f"{len(kept)} cities within {radius} km of {centre}")
+        st.dataframe(pd.DataFrame({
+            "City": np.asarray(cities, dtype=object)[kept[:10]],
+            "Distance (km)": distances[:10].round(1),
+        }), hide_index=True)
+    return kept
+
+
+# "Sort by" choice that keeps the frame's own row order (e.g. Prim order)
+ORIGINAL_ORDER = "(original order)"
+
+
+# One paginated table over a precomputed frame, with search on search_column
+# and sorting done on the server; only the rows of the current page are sent
+# to the browser. Rows keep the frame's order until a sort column is chosen.
+# `key` must be unique on the page.
+def paged_table(frame, key, search_column='City', page_size=DEFAULT_PAGE_SIZE):
+    search_col, sort_col, order_col, page_col = st.columns([3, 3, 2, 2])
+    query = search_col.text_input("Search", key=f"{key}_search", placeholder=f"{search_column} contains...")
+    sort_by = sort_col.selectbox("Sort by", [ORIGINAL_ORDER, *frame.columns], key=f"{key}_sort")
+    if sort_by == ORIGINAL_ORDER:
+        sort_by = None
+    descending = order_col.toggle("Descending", key=f"{key}_descending")
+
+    with stage(f"table {key}"):
+        view = table_view(frame, query, search_column, sort_by, descending)
+        pages = page_count(len(view), page_size)
+        # Keep the page in range when a new search leaves fewer pages
+        if st.session_state.get(f"{key}_page", 1) > pages:
+            st.session_state[f"{key}_page"] = pages
+    page = page_col.number_input("Page", min_value=1, max_value=pages, key=f"{key}_page")
+
+    start, end = page_bounds(len(view), page, page_size)
+    st.dataframe(frame.iloc[view[start:end]], hide_index=True, use_container_width=True)
+    st.caption(f"Rows {start + 1 if end else 0}-{end} of {len(view):,} (page {page} of {pages})")
+
+
+# Contents of an export file. Export file names are derived from a key of
+# their content, so a path never changes content and its bytes can be cached.
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _export_bytes(path):
+    note_miss("export")
+    return Path(path).read_bytes()
+
+
+# Format picker and download button for one export. export(fmt) returns the
+# path of the export file in that format (see enerconnect.export).
+def download_export(label, export, file_stem, key):
+    fmt = st.selectbox("Format", list(EXPORT_FORMATS), format_func=FORMAT_LABELS.get, key=f"{key}_format")
+    with stage("export"):
+        data = cached_call("export", _export_bytes, str(export(fmt)))
+    suffix, mime = EXPORT_FORMATS[fmt]
+    st.download_button(label=label, data=data, file_name=file_stem + suffix, mime=mime, key=f"{key}_download")
+
+
+# Background jobs (see enerconnect.jobs), one pool for the whole server
+@st.cache_resource
+def job_cache():
+    return JobCache()
+
+
+# Quick jobs are waited for this long, so cached results show without a
+# progress bar; slower ones continue in the background
+JOB_WAIT_SECONDS = 0.2
+
+# How often a waiting page refreshes the progress of a job
+JOB_POLL_SECONDS = 1.0
+
+
+# Job for `key` running fn(report) in the background, coalesced with the
+# same request from this or any other session
+def background_job(cache, key, fn, wait=JOB_WAIT_SECONDS):
+    jobs = job_cache()
+    hit = key in jobs
+    job = jobs.submit(key, fn)
+    timings = current_timings()
+    if timings is not None:
+        timings.count(cache, hit=hit)
+    if wait:
+        job.wait(wait)
+    return job
+
+
+# The MST does not depend on the starting city, so it is computed once per
+# dataset (or year) version and weight split (in memory and in the on-disk
+# artifact store) and only re-rooted when the city changes
+def mst_job(df, version, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT, wait=JOB_WAIT_SECONDS):
+    return background_job("mst", ("mst", version, distance_weight, consumption_weight),
+                          lambda report: cached_mst(df, version, distance_weight, consumption_weight, progress=report),
+                          wait)
+
+
+# Warm-up of a fresh server process, done once by the first page rendered:
+# the MST of the default year choice is started in the background, so the
+# Distribution page finds it ready. `python -m enerconnect warmup` prepares
+# the on-disk artifacts before the server starts (see enerconnect.startup).
+@st.cache_resource(show_spinner=False)
+def _warm_up(path, version):
+    note_miss("warm-up")
+    mst_job(get_timeseries(path).latest, f"{version}:{LATEST}", wait=0)
+
+
+def warm_up(path=DATASET_PATH):
+    cached_call("warm-up", _warm_up, str(path), dataset_version(path))
+
+
+# Progress of a running job, refreshed without rerunning the page;
+# show_partial(partial) draws its partial result when it has one. The whole
+# page reruns once the job is done.
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(job, show_partial=None):
+    if job.done:
+        st.rerun()
+    st.progress(job.fraction, text=f"{job.message}... {job.fraction:.0%}")
+    if show_partial is not None and job.partial is not None:
+        show_partial(job.partial)
+
+
+# Diagnostics are opt-in, through the ?diagnostics= query parameter or the
+# ENERCONNECT_DIAGNOSTICS environment variable: "1" shows stage timings,
+# "memory" adds tracemalloc peaks and "profile" adds cProfile output too.
+def diagnostics_mode():
+    return st.query_params.get("diagnostics") or os.environ.get("ENERCONNECT_DIAGNOSTICS", "")
+
+
+# Start collecting the stages of this rerun of `page`
+def start_rerun(page):
+    mode = diagnostics_mode()
+    timings = Instrumentation(page, trace_memory=mode in ("memory", "profile"), profile=mode == "profile")
+    st.session_state["_timings"] = timings
+    return timings
+
+
+def current_timings():
+    try:
+        return st.session_state.get("_timings")
+    except Exception:  # No script run context (bare mode, scripts)
+        return None
+
+
+# Time a block of the current rerun; a no-op when no rerun is being recorded
+def stage(name):
+    timings = current_timings()
+    if timings is None:
+        return nullcontext({})
+    return timings.stage(name)
+
+
+# Resident memory of the server process in bytes, when psutil is available
+def _process_memory():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+# Log the rerun (and append it to ENERCONNECT_TIMING_LOG if set), then show
+# the diagnostics panel in the sidebar when enabled
+def finish_rerun(timings):
+    timings.dump(os.environ.get("ENERCONNECT_TIMING_LOG"))
+    if not diagnostics_mode():
+        return
+
+    with st.sidebar:
+        st.subheader("Diagnostics")
+        st.caption(f"{timings.name} rerun: {timings.total_seconds * 1000:.1f} ms")
+        stages = pd.DataFrame([
+            {
+                "Stage": record["stage"],
+                "Time (ms)": round(record["seconds"] * 1000, 2),
+                "Peak memory (MiB)": round(record["peak_bytes"] / 2**20, 2) if "peak_bytes" in record else None,
+            }
+            for record in timings.stages
+        ])
+        st.dataframe(stages, hide_index=True, use_container_width=True)
+        if timings.cache:
+            cache = pd.DataFrame([
+                {"Cache": name, "Hits": counts["hits"], "Misses": counts["misses"]}
+                for name, counts in timings.cache.items()
+            ])
+            st.dataframe(cache, hide_index=True, use_container_width=True)
+        memory = _process_memory()
+        if memory is not None:
+            st.metric("Process memory", f"{memory / 2**20:.0f} MiB")
+        for record in timings.stages:
+            if "profile" in record:
+                with st.expander(f"Profile: {record['stage']}"):
+                    st.code(record["profile"])
@@ -0,0 +1,85 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371  # Radius of the Earth in km
+
+# Default blend of the edge cost: 60% distance, 40% electricity consumption
+DISTANCE_WEIGHT = 0.6
+CONSUMPTION_WEIGHT = 0.4
+
+
+# Function to calculate distance using Haversine formula.
+# Works on scalars as well as on broadcastable NumPy arrays.
+def calculate_distance(lat1, lon1, lat2, lon2):
+    dlat = np.radians(lat2 - lat1)
+    dlon = np.radians(lon2 - lon1)
+    a = np.sin(dlat / 2) ** 2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c  # Distance in kilometers
+
+
+# Function to calculate edge weight based on distance and consumption of two rows
+def calculate_edge_weight(row1, row2, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT):
+    lat1, lon1 = float(row1['Latitude']), float(row1['Longitude'])
+    lat2, lon2 = float(row2['Latitude']), float(row2['Longitude'])
+    avg_consumption = (row1['Total Consumption (MWh)'] + row2['Total Consumption (MWh)']) / 2
+    distance = calculate_distance(lat1, lon1, lat2, lon2)
+    weight = (distance * distance_weight) + (avg_consumption * consumption_weight)
+    return weight
+
+
+# Pairwise haversine distances (km) between all points, as a dense n x n matrix
+def distance_matrix(lat, lon):
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    return calculate_distance(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+# Pairwise average consumption (c_i + c_j) / 2, as a dense n x n matrix
+def mean_consumption_matrix(consumption):
+    consumption = np.asarray(consumption, dtype=np.float64)
+    return (consumption[:, None] + consumption[None, :]) / 2
+
+
+# Position of the pair (i, j), i != j, inside a condensed upper-triangular array
+# (same layout as scipy.spatial.distance.squareform)
+def condensed_index(n, i, j):
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+
+# Keep only the upper triangle (i < j) of a symmetric matrix, row by row
+def to_condensed(matrix):
+    rows, cols = np.triu_indices(matrix.shape[0], k=1)
+    return matrix[rows, cols]
+
+
+# Edge weights of the complete graph over the cities in df, built in one
+# broadcast from the Latitude, Longitude and Total Consumption (MWh) columns.
+# Returns a dense n x n matrix with a zero diagonal, or the condensed upper
+# triangle when condensed=True. Values match calculate_edge_weight.
+def weight_matrix(df, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT, condensed=False):
+    lat, lon, consumption = network_arrays(df)
+    distance = distance_matrix(lat, lon)
+    avg_consumption = mean_consumption_matrix(consumption)
+    weights = (distance * distance_weight) + (avg_consumption * consumption_weight)
+    np.fill_diagonal(weights, 0)
+    if condensed:
+        return to_condensed(weights)
+    return weights
+
+
+# Weights of the edges (i[k], j[k]) only, for sparse graphs and row-by-row use.
+# i and j are index arrays (or scalars) into the lat/lon/consumption arrays.
+def edge_weights(lat, lon, consumption, i, j, distance_weight=DISTANCE_WEIGHT, consumption_weight=CONSUMPTION_WEIGHT):
+    distance = calculate_distance(lat[i], lon[i], lat[j], lon[j])
+    avg_consumption = (consumption[i] + consumption[j]) / 2
+    return (distance * distance_weight) + (avg_consumption * consumption_weight)
+
+
+# Latitude, Longitude and Total Consumption (MWh) columns as float arrays
+def network_arrays(df):
+    return (
+        df['Latitude'].to_numpy(dtype=np.float64),
+        df['Longitude'].to_numpy(dtype=np.float64),
+        df['Total Consumption (MWh)'].to_numpy(dtype=np.float64),
+    )
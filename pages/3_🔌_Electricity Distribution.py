@@ -1,236 +1,247 @@
-import pandas as pd
-import numpy as np
-import networkx as nx
 import streamlit as st
-from math import radians, sin, cos, sqrt, atan2
 import pydeck as pdk
-import streamlit as st
-import folium
-from streamlit_folium import st_folium
-from folium.plugins import Fullscreen
+from enerconnect import reroot_mst
+from enerconnect.export import export_edges
+from enerconnect.paths import PathIndex
+from enerconnect.regions import RegionTree
+from enerconnect.render import (
+    CLUSTER_THRESHOLD,
+    DEFAULT_ZOOM,
+    NETWORK_TOOLTIP,
+    REGION_COLORS,
+    edge_table,
+    network_cities,
+    network_edges,
+    network_records,
+    route_table,
+)
+from enerconnect.sensitivity import SWEEP_MAX_CITIES, WeightSweep
+from enerconnect.ui import (
+    background_job,
+    cached_call,
+    download_export,
+    finish_rerun,
+    job_progress,
+    mst_job,
+    network_map,
+    note_miss,
+    paged_table,
+    radius_filter,
+    select_year,
+    stage,
+    start_rerun,
+    warm_up,
+)
+from enerconnect.weights import DISTANCE_WEIGHT
 
 # Page configuration
 st.set_page_config(page_title="Electricity | EnerConnect", layout="wide")
+timings = start_rerun("Electricity Distribution")
+warm_up()
 
-# Streamlit session state to retrieve data
-if 'df' not in st.session_state:
-    st.error("Data not found! Please visit the Home page first.")
-else:
-    df = st.session_state.df
-
-# Title and description of the app
+# Title and description of the app; the description names the weight split,
+# so it is filled in once the split is chosen below
 st.title("Electricity Distribution Optimization :zap:")
-st.markdown("""
-This page visualizes the electricity distribution network using the Minimum Spanning Tree (MST) algorithm. 
-You can select a starting city, view the optimal distribution route, explore the network, view the connected cities, and examine the corresponding edge weights. 
-The cost displayed is a combination of these factors, with the distance given a weight of 60% and electricity consumption a weight of 40%.
-""")
+intro = st.empty()
+
+# Cities of the selected year; every cache below is keyed by its version
+year, df, version = select_year("distribution_year")
+
 st.subheader("Select the Starting City")
 starting_city = st.selectbox("Choose one :", df['City'])
 
-# Function to calculate distance using Haversine formula
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Radius of the Earth in km
-    dlat = np.radians(lat2 - lat1)
-    dlon = np.radians(lon2 - lon1)
-    a = np.sin(dlat / 2) ** 2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon / 2) ** 2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-    return R * c  # Distance in kilometers
-
-# Function to calculate edge weight based on distance and consumption
-def calculate_edge_weight(row1, row2, distance_weight=0.6, consumption_weight=0.4):
-    lat1, lon1 = float(row1['Latitude']), float(row1['Longitude'])
-    lat2, lon2 = float(row2['Latitude']), float(row2['Longitude'])
-    avg_consumption = (row1['Total Consumption (MWh)'] + row2['Total Consumption (MWh)']) / 2
-    distance = calculate_distance(lat1, lon1, lat2, lon2)
-    weight = (distance * distance_weight) + (avg_consumption * consumption_weight)
-    return weight
-
-# Create adjacency list with edge weights
-def build_adjacency_list(df, distance_weight=0.6, consumption_weight=0.4):
-    adjacency_list = {i: [] for i in range(len(df))}
-    for i, row1 in df.iterrows():
-        for j, row2 in df.iterrows():
-            if i != j:
-                weight = calculate_edge_weight(row1, row2, distance_weight, consumption_weight)
-                adjacency_list[i].append((j, weight))  # Add edge with weight to the adjacency list
-    return adjacency_list
-
 # Map city to index
 city_to_index = {city: idx for idx, city in enumerate(df['City'])}
 index_to_city = {idx: city for city, idx in city_to_index.items()}
 
-# Build the adjacency list using the provided weights
-adjacency_list = build_adjacency_list(df)
-
-# Prim's Algorithm for MST
-def prim_mst(start_city_idx):
-    visited = [False] * len(df)  # Track visited cities
-    edges = []  # Store edges of the MST
-    path = []  # Store the sequence of cities visited (path)
-    visited[start_city_idx] = True  # Mark the start city as visited
-    mst_cost = 0  # Total cost of the MST
-
-    while len(edges) < len(df) - 1:  # Until we have n-1 edges in the MST
-        min_edge = (None, None, float('inf'))  # Initialize with an infinitely large weight
-        for u in range(len(df)):  # Iterate over all cities
-            if visited[u]:  # Only process cities that have been visited
-                for v, weight in adjacency_list[u]:  # Iterate over neighbors of city u
-                    if not visited[v] and weight < min_edge[2]:  # Check if the neighbor v has not been visited and has a smaller weight
-                        min_edge = (u, v, weight)  # Update the minimum edge
-
-        u, v, weight = min_edge  # Extract the edge with the minimum weight
-        if v is not None:  # If a valid edge is found
-            visited[v] = True  # Mark the destination city as visited
-            edges.append((u, v, weight))  # Add the edge to the MST
-            path.append((index_to_city[u], index_to_city[v]))  # Add the path to the path list
-            mst_cost += weight  # Add the weight to the total MST cost
-
-    return edges, mst_cost, path  # Return the edges, total cost, and path sequence
-
 # Convert selected city to index
 start_city_idx = city_to_index[starting_city]
 
-# Run Prim's Algorithm with the selected city
-edges, total_cost, path = prim_mst(start_city_idx)
-
-# Visualization with Pydeck
-edges_for_display = [(index_to_city[u], index_to_city[v], f"Weight: {d:.2f}") for u, v, d in edges]
-text_annotations = [{"position": [row['Longitude'], row['Latitude']], "text": row['City']} for _, row in df.iterrows()]
-
-# Tabs for results
-tab1, tab2, tab3 = st.tabs(["🗺️ Network Visualization", "⚖️ Edge Weights", "📈 Results"])
+# Trees over the slider's weight splits, computed once per dataset version in
+# the background and shared read-only by all sessions
+def weight_sweep_job(df, version):
+    return background_job("sweep", ("sweep", version), lambda report: WeightSweep(df, progress=report))
+
+# Path index over one tree, shared by all sessions. The tree is identified by
+# the dataset version and its tree key: where it came from ("mst" or
+# "sweep", which may break ties differently) and the distance weight.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_path_index(_tree_edges, version, tree_key):
+    note_miss("paths")
+    return PathIndex(_tree_edges, len(_tree_edges) + 1)
+
+# Supply regions (single-linkage clusters) of one tree, shared by all
+# sessions and keyed like the path index
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_region_tree(_tree_edges, _df, version, tree_key):
+    note_miss("regions")
+    return RegionTree(_tree_edges, _df)
+
+# Weight split: 60/40 by default, or explored live with a slider
+st.subheader("Distance / Consumption Weight")
+explore_weights = len(df) <= SWEEP_MAX_CITIES and st.toggle("Explore other weight splits")
+if explore_weights:
+    distance_pct = st.slider("Distance weight (%)", 0, 100, int(DISTANCE_WEIGHT * 100), step=5)
+    st.caption(f"Cost = {distance_pct}% distance + {100 - distance_pct}% electricity consumption")
+
+distance_weight = distance_pct / 100 if explore_weights else DISTANCE_WEIGHT
+tree_key = ("sweep" if explore_weights else "mst", distance_weight)
+distance_share = round(distance_weight * 100)
+intro.markdown(f"""
+This page visualizes the electricity distribution network using the Minimum Spanning Tree (MST) algorithm. 
+You can select a starting city, view the optimal distribution route, explore the network, view the connected cities, and examine the corresponding edge weights. 
+The cost displayed is a combination of these factors, with the distance given a weight of {distance_share}% and electricity consumption a weight of {100 - distance_share}%.
+""")
+with stage("mst"):
+    job = weight_sweep_job(df, version) if explore_weights else mst_job(df, version)
 
-with tab1:
-    st.subheader("Network Visualization on the Map")
-    
-    # Prepare data for pydeck visualization
-    city_data = []
-    for idx, row in df.iterrows():
-        popup_text = f"City: {row['City']}<br>Consumption: {row['Total Consumption (MWh)']} MWh"
-        # Set the color to white for the starting city, otherwise blue
-        color = [255, 255, 255] if row['City'] == starting_city else [0, 0, 255]
-        city_data.append({
-            "coordinates": [row['Longitude'], row['Latitude']],
-            "popup": popup_text,
-            "radius": 10000,
-            "color": color,  # Use the color here
-        })
-
-
-    edge_data = []
-    for u, v, weight in edges:
-        city1 = df.loc[df['City'] == index_to_city[u]].iloc[0]
-        city2 = df.loc[df['City'] == index_to_city[v]].iloc[0]
-        edge_data.append({
-            "source_position": [city1['Longitude'], city1['Latitude']],
-            "target_position": [city2['Longitude'], city2['Latitude']],
-            "weight": f"{weight:.2f}",
-            "popup": f"Connected Cities: {city1['City']} ↔ {city2['City']}<br>Weight: {weight:.2f}"
-        })
-
-
-    # City markers with popups
+# Deck of city markers and tree edges from compact map records (see
+# render.network_records), centred on the cities of map_df
+def network_deck(city_records, edge_records, map_df, zoom=DEFAULT_ZOOM):
+    # City markers, or clusters of cities on large maps
     city_layer = pdk.Layer(
         "ScatterplotLayer",
-        data=city_data,
-        get_position="coordinates",
+        id="cities",
+        data=city_records,
+        get_position=["lon", "lat"],
         get_color="color",
         get_radius="radius",
         pickable=True,
     )
 
-    # Edges with popups
+    # Edges, in the color of their region when they have one
     edge_layer = pdk.Layer(
         "LineLayer",
-        data=edge_data,
-        get_source_position="source_position",
-        get_target_position="target_position",
-        get_color=[255, 165, 0],
+        data=edge_records,
+        get_source_position=["source_lon", "source_lat"],
+        get_target_position=["target_lon", "target_lat"],
+        get_color="color",
         get_width=2,
         pickable=True,
     )
 
     # Combine layers into a deck
-    deck = pdk.Deck(
+    return pdk.Deck(
         layers=[city_layer, edge_layer],
         initial_view_state=pdk.ViewState(
-            latitude=df['Latitude'].mean(),
-            longitude=df['Longitude'].mean(),
-            zoom=5,
+            latitude=map_df['Latitude'].mean(),
+            longitude=map_df['Longitude'].mean(),
+            zoom=zoom,
         ),
-        tooltip={
-            "html": "{popup}",
-            "style": {"backgroundColor": "steelblue", "color": "white"},
-        },
+        tooltip=NETWORK_TOOLTIP,
     )
-    st.pydeck_chart(deck)
+
+# While the tree is being built, show its progress and the part grown so far
+if not job.done:
+    def show_partial_tree(edges):
+        city_records, edge_records, _ = network_records(network_cities(df, 0), network_edges(df, list(edges)))
+        st.pydeck_chart(network_deck(city_records, edge_records, df))
+
+    job_progress(job, show_partial_tree)
+    finish_rerun(timings)
+    st.stop()
+
+if explore_weights:
+    sweep = job.result()
+    tree_edges, _ = sweep.lookup(distance_weight)
+    # Locating the breakpoints costs extra tree runs, so only when asked for
+    if st.toggle("📉 Show total MST cost by distance weight"):
+        with stage("cost curve"):
+            curve = sweep.cost_curve()
+        st.line_chart(curve, x="Distance weight", y="Total MST cost")
+        caption = f"The tree changes at {len(sweep.breakpoints)} points between 0% and 100% distance weight"
+        if sweep.unresolved:
+            caption += f" ({sweep.unresolved} of them located only to within the points shown)"
+        st.caption(caption + ".")
+else:
+    tree_edges = job.result()
+
+# Orient the cached tree from the selected city
+with stage("reroot"):
+    edges, total_cost, path = reroot_mst(tree_edges, start_city_idx, df['City'].tolist())
+
+# Table payload, gathered by position from the city and edge arrays
+with stage("payload"):
+    edge_frame = network_edges(df, edges)
+
+# Tabs for results
+tab1, tab2, tab3 = st.tabs(["🗺️ Network Visualization", "⚖️ Edge Weights", "📈 Results"])
+
+with tab1:
+    st.subheader("Network Visualization on the Map")
+
+    # Optionally show only the cities (and tree edges) around one city
+    nearby = radius_filter(df, version, "distribution", chart_key="distribution_map")
+    map_df = df if nearby is None else df.iloc[nearby]
+
+    # Optionally split the network into supply regions by cutting its most
+    # expensive links, and color the cities and edges of each region
+    show_regions = len(df) > 1 and st.toggle("Color by supply region", key="regions_enabled")
+    labels = region_count = None
+    if show_regions:
+        region_count = st.slider("Number of regions", 1, min(len(df), len(REGION_COLORS)), min(4, len(df)),
+                                 key="region_count")
+        with stage("regions"):
+            regions = cached_call("regions", get_region_tree, tree_edges, df, version, tree_key)
+            labels = regions.labels(region_count)
+
+    # Large selections are drawn as clusters sized for the chosen zoom level
+    zoom = DEFAULT_ZOOM
+    if len(map_df) > CLUSTER_THRESHOLD:
+        zoom = st.select_slider("Map detail (zoom level)", options=list(range(3, 11)), value=DEFAULT_ZOOM,
+                                key="distribution_zoom")
+
+    with stage("render"):
+        # Only the fields the layers and tooltip use, cached between reruns
+        city_records, edge_records, clustered = network_map(df, edges, version, tree_key, start_city_idx,
+                                                            labels, region_count, nearby, zoom)
+        if clustered:
+            st.caption(f"{len(map_df):,} cities grouped into {len(city_records):,} clusters.")
+        deck = network_deck(city_records, edge_records, map_df, zoom)
+        st.pydeck_chart(deck, on_select="rerun", key="distribution_map")
+
+    if show_regions:
+        st.markdown("### Supply Regions")
+        st.caption(f"Cutting the {region_count - 1} most expensive links of the MST leaves {region_count} regions.")
+        paged_table(regions.regions(region_count), "regions", search_column="Main City")
 
 with tab2:
     st.subheader("Edge Weights Table")
-    edge_info = [{"Origin City": index_to_city[u], "Destination City": index_to_city[v], "Weight (Cost)": f"{weight:.2f}"} for u, v, weight in edges]
-    edge_df = pd.DataFrame(edge_info)
-    st.table(edge_df)
+    edge_weights = edge_table(edge_frame)
+    paged_table(edge_weights, "edges", search_column="Origin City")
+    download_export(
+        "Download MST Edges",
+        lambda fmt: export_edges(edge_weights, version, (*tree_key, start_city_idx), fmt),
+        f"mst_edges_{starting_city}",
+        key="edges_export",
+    )
 
 with tab3:
     st.metric(label="Total Cost of Minimum Spanning Tree (MST)", value=f"💰 {total_cost:.2f}")
 
+    st.markdown("### Route Between Two Cities")
+    from_column, to_column = st.columns(2)
+    route_from = from_column.selectbox("From", df['City'], index=start_city_idx, key="route_from")
+    route_to = to_column.selectbox("To", df['City'], index=len(df) - 1, key="route_to")
+    with stage("paths"):
+        path_index = cached_call("paths", get_path_index, tree_edges, version, tree_key)
+        route = path_index.query(city_to_index[route_from], city_to_index[route_to])
+
+    hops_column, cost_column, bottleneck_column = st.columns(3)
+    hops_column.metric("Hops", route["hops"])
+    cost_column.metric("Route cost", f"{route['cost']:.2f}")
+    if route["hops"]:
+        bottleneck_u, bottleneck_v = route["bottleneck_edge"]
+        bottleneck_column.metric("Most expensive link", f"{route['bottleneck']:.2f}",
+                                 help=f"{index_to_city[bottleneck_u]} ↔ {index_to_city[bottleneck_v]}")
+    else:
+        bottleneck_column.metric("Most expensive link", "-")
+    st.markdown(" → ".join(f"**{index_to_city[city]}**" for city in route["path"]))
+
     st.markdown("### Route of Cities in MST")
 
-    # Dictionary untuk menyimpan rute per kota asal
-    city_connections = {}
-
-    # Grouping the edges by origin city
-    for u, v, _ in edges:
-        origin_city = index_to_city[u]
-        destination_city = index_to_city[v]
-
-        # Tambahkan destinasi ke kota asal yang sesuai
-        if origin_city not in city_connections:
-            city_connections[origin_city] = []
-        city_connections[origin_city].append(destination_city)
-
-    # Menyimpan nomor langkah progresif untuk kota yang sudah ditampilkan
-    displayed_cities = set()
-    step_counter = 1  # Nomor langkah dimulai dari 1
-
-    for origin_city, destinations in city_connections.items():
-        # Jika kota asal belum ditampilkan, tampilkan dan gunakan nomor langkah progresif yang baru
-        if origin_city not in displayed_cities:
-            displayed_cities.add(origin_city)
-
-            # Tampilkan langkah progresif untuk kota asal dengan nomor besar dan font tebal
-            st.markdown(
-                f"""
-                <div style="display: flex; align-items: center; margin-bottom: 10px;">
-                    <div style="font-size: 20px; font-weight: bold; color: #FFA500; margin-right: 10px;">
-                        {step_counter}
-                    </div>
-                    <div style="font-size: 18px; color: #444;">
-                        <strong>{origin_city}</strong>
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-            step_counter += 1  # Increment step for the next city
-
-        # Tampilkan setiap rute yang berhubungan dengan kota asal tersebut dengan emoji penanda
-        for destination_city in destinations:
-            # Tampilkan rute dengan emoji bintang dan tanda panah yang lebih elegan
-            st.markdown(
-                f"""
-                <div style="display: flex; align-items: center; margin-bottom: 10px; background-color: #FFFAF0; border-radius: 8px; padding: 8px;">
-                    <div style="font-size: 20px; margin-right: 10px;">
-                        ⭐
-                    </div>
-                    <div style="font-size: 16px; color: #444;">
-                        <strong>{origin_city} → {destination_city}</strong>
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+    # Edges grouped by origin city, numbered in the order the origins are reached
+    paged_table(route_table(edge_frame), "routes", search_column="Origin City")
 
     st.markdown("<br>", unsafe_allow_html=True)
     # Kesimpulan
@@ -244,4 +255,6 @@ st.markdown("""
 <div style="text-align: center; color: gray;">
     <small>© 2024 EnerConnect. All rights reserved.</small>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_rerun(timings)
\ No newline at end of file
@@ -1,5 +1,4 @@
 import streamlit as st
-from PIL import Image
 
 # Page configuration
 st.set_page_config(page_title="About Us | EnerConnect", layout="wide")